@@ -3,24 +3,401 @@
 Created on Wed Dec 13 18:29:49 2023
 
 @author: neell
+
+Dev:         python apps.py
+Production:  python apps.py --production --pool 1000 --port 8000
+
+/blog, /blog/<slug> and /blog/tags/<tag> render straight from the Obsidian
+vault with blogs/create_blog.py's functions, so edits show up on reload.
 """
-from flask import Flask, render_template
-from gevent.pywsgi import WSGIServer
+import os
+import re
+import time
+import socket
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from collections import OrderedDict
+
+from flask import Flask, Response, render_template, make_response, request, abort, send_from_directory
+from gevent.pool import Pool
+from gevent.pywsgi import WSGIServer, WSGIHandler
+
+from blogs import create_blog as cb
+
+# ==============================
+# CONFIG
+# ==============================
+
+TEMPLATE_DIR = "templates"        # relative to this file (Flask's default)
+HOST = "127.0.0.1"
+PORT = 5000
+POOL_SIZE = 1000                  # max concurrent greenlets in production mode
+
+PAGE_CACHE_ENABLED = True
+TEMPLATE_CHECK_INTERVAL = 1.0     # seconds between template folder stats
+
+# Dynamic blog (paths/index source come from blogs/create_blog.py's CONFIG)
+BLOG_CACHE_SIZE = 256             # rendered blog pages kept in memory
+BLOG_CHECK_INTERVAL = 1.0         # seconds between vault stats
+BLOG_MEDIA_PREFIX = "/blog/media/"
+ATTACHMENTS_DIR = "Attachments"   # relative to this file; the navbar logo lives here
+
+# The blog's page chrome links the static site's pages; these are their routes here
+SITE_ROUTES = {"index": "/", "about": "/about", "poetry": "/poetry", "photos": "/photos", "blog": "/blog"}
+SITE_LINK_RE = re.compile(r'href="/(%s)\.html"' % "|".join(SITE_ROUTES))
+
+app = Flask(__name__, template_folder=TEMPLATE_DIR)
+
+# ==============================
+# Rendered page cache
+# ==============================
+
+_page_cache = {}                  # route key -> (template signature, body, etag)
+_template_sig = {"checked": 0.0, "value": None}
+
+def template_signature():
+    """(name, mtime, size) of every template file; rechecked at most once per interval."""
+    now = time.monotonic()
+    if _template_sig["value"] is not None and now - _template_sig["checked"] < TEMPLATE_CHECK_INTERVAL:
+        return _template_sig["value"]
+
+    folder = os.path.join(app.root_path, app.template_folder)
+    entries = []
+    for dirpath, _, filenames in os.walk(folder):
+        for name in filenames:
+            try:
+                st = os.stat(os.path.join(dirpath, name))
+            except OSError:
+                continue
+            entries.append((os.path.relpath(os.path.join(dirpath, name), folder), st.st_mtime_ns, st.st_size))
+    entries.sort()
+
+    _template_sig["value"] = tuple(entries)
+    _template_sig["checked"] = now
+    return _template_sig["value"]
+
+def cached_page(template_name: str, **context):
+    """
+    render_template memoized per route; re-rendered when any template file
+    changes (includes/extends too). Conditional GETs get a 304.
+    """
+    if not PAGE_CACHE_ENABLED:
+        return render_template(template_name, **context)
+
+    key = (request.endpoint, template_name)
+    sig = template_signature()
+    entry = _page_cache.get(key)
+    if entry is None or entry[0] != sig:
+        body = render_template(template_name, **context)
+        etag = hashlib.sha1(body.encode("utf-8")).hexdigest()[:16]
+        entry = (sig, body, etag)
+        _page_cache[key] = entry
+
+    resp = make_response(entry[1])
+    resp.set_etag(entry[2])
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp.make_conditional(request)
+
+# ==============================
+# Dynamic blog
+# ==============================
+
+def route_links(html: str) -> str:
+    """Point the chrome's /index.html, /about.html, ... links at this app's routes."""
+    return SITE_LINK_RE.sub(lambda m: f'href="{SITE_ROUTES[m.group(1)]}"', html)
+
+class BlogSource:
+    """One published post: where it lives and its last-seen stat/hash."""
+
+    __slots__ = ("row", "file_name", "folder_name", "slug", "featured", "md_path",
+                 "mtime_ns", "size", "md_hash", "post")
+
+    def __init__(self, row, file_name, folder_name, slug, featured, md_path, old=None):
+        self.row, self.file_name, self.folder_name = row, file_name, folder_name
+        self.slug, self.featured, self.md_path = slug, featured, md_path
+        # Keep what we know about the file if the index row didn't change
+        same = old is not None and old.md_path == md_path and old.row == row
+        self.mtime_ns = old.mtime_ns if same else None
+        self.size = old.size if same else None
+        self.md_hash = old.md_hash if same else None
+        self.post = old.post if same else None
+
+class DynamicBlog:
+    """
+    Published posts are re-read from the vault when their (mtime, size)
+    changes; a file that was touched but not edited keeps its hash and its
+    cached HTML. Rendered pages live in a bounded LRU keyed on the hashes of
+    their inputs, so a stale page is never served, only evicted.
+    """
+
+    def __init__(self, max_pages: int = BLOG_CACHE_SIZE):
+        self.max_pages = max_pages
+        self.pages = OrderedDict()      # (kind, name, inputs hash) -> (html, etag)
+        self.sources = {}               # slug -> BlogSource, in index order
+        self.index_sig = None
+        self.generation = ""            # hash over every post's inputs
+        self.checked = 0.0
+        self.lock = threading.Lock()
+        self.hits = self.misses = self.renders = 0
+
+    # -------- vault state --------
+
+    def index_signature(self):
+        if cb.INDEX_SOURCE == "excel":
+            paths = [Path(cb.EXCEL_PATH)]
+        elif cb.INDEX_SOURCE == "csv":
+            paths = [Path(cb.CSV_PATH)]
+        else:
+            paths = sorted(Path(cb.OBSIDIAN_ROOT).glob("*/*.md"))
+        sig = []
+        for path in paths:
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            sig.append((str(path), st.st_mtime_ns, st.st_size))
+        return tuple(sig)
+
+    def refresh(self):
+        """Bring self.sources up to date (at most once per BLOG_CHECK_INTERVAL)."""
+        now = time.monotonic()
+        if self.index_sig is not None and now - self.checked < BLOG_CHECK_INTERVAL:
+            return
+        self.checked = now
+
+        obs_root = Path(cb.OBSIDIAN_ROOT)
+        index_sig = self.index_signature()
+        if index_sig != self.index_sig:
+            rows = cb.load_index(cb.INDEX_SOURCE, obs_root)
+            self.sources = {
+                slug: BlogSource(row, file_name, folder_name, slug, featured, md_path, self.sources.get(slug))
+                for row, file_name, folder_name, slug, featured, md_path in cb.iter_published(rows, obs_root)
+            }
+            self.index_sig = index_sig
+
+        for src in self.sources.values():
+            self.check_source(src)
 
-app = Flask(__name__)
+        self.generation = cb.hash_json(
+            [(src.slug, src.md_hash, cb.hash_row(src.row)) for src in self.sources.values()]
+        )
+
+    def check_source(self, src: BlogSource):
+        try:
+            st = src.md_path.stat()
+        except OSError:
+            return
+        if src.mtime_ns == st.st_mtime_ns and src.size == st.st_size:
+            return
+        md_hash = cb.hash_bytes(src.md_path.read_bytes())
+        src.mtime_ns, src.size = st.st_mtime_ns, st.st_size
+        if md_hash != src.md_hash:
+            src.md_hash = md_hash
+            src.post = None
+
+    # -------- rendering --------
+
+    def media_url(self, post_page_src: str | None) -> str | None:
+        if post_page_src and post_page_src.startswith(cb.POST_PAGE_IMAGE_PREFIX):
+            return BLOG_MEDIA_PREFIX + post_page_src[len(cb.POST_PAGE_IMAGE_PREFIX):]
+        return post_page_src
+
+    def render(self, src: BlogSource) -> str:
+        """Render one post (links rewritten for these routes); sets src.post."""
+        raw_md = cb.read_text(src.md_path)
+        post, page_slots = cb.render_post({
+            "raw_md": raw_md,
+            "md_path": str(src.md_path),
+            "file_name": src.file_name,
+            "folder_name": src.folder_name,
+            "slug": src.slug,
+            "featured": src.featured,
+            "images": {},
+            "root": "/",
+            "image_base": BLOG_MEDIA_PREFIX,
+        })
+        hero = self.media_url(cb.extract_first_image_src(raw_md, src.folder_name, "post_page"))
+        post.url_site_root = post.url_from_tag_page = f"/blog/{src.slug}"
+        post.hero_image = post.hero_image_tag_page = hero
+        src.post = post
+        self.renders += 1
+        return route_links(cb.post_page_template().render(**page_slots))
+
+    def all_posts(self) -> list[cb.Post]:
+        posts = []
+        for src in self.sources.values():
+            if src.post is None:
+                self.store(("post", src.slug, src.md_hash), self.render(src))
+            posts.append(src.post)
+        return posts
+
+    # -------- page LRU --------
+
+    def lookup(self, key):
+        entry = self.pages.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.pages.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def store(self, key, html: str):
+        entry = (html, cb.hash_bytes(html.encode("utf-8"))[:16])
+        self.pages[key] = entry
+        self.pages.move_to_end(key)
+        while len(self.pages) > self.max_pages:
+            self.pages.popitem(last=False)
+        return entry
+
+    def page(self, kind: str, name: str = ""):
+        """(html, etag) for the index, a post or a tag page; None if there's no such page."""
+        with self.lock:
+            self.refresh()
+
+            if kind == "post":
+                src = self.sources.get(name)
+                if src is None:
+                    return None
+                key = ("post", name, src.md_hash)
+                return self.lookup(key) or self.store(key, self.render(src))
+
+            key = (kind, name, self.generation)
+            entry = self.lookup(key)
+            if entry is not None:
+                return entry
+
+            posts = self.all_posts()
+            all_tags, tag_to_posts = cb.group_by_tag(posts)
+            if kind == "index":
+                html = cb.blog_index_template().render(**cb.blog_index_slots(
+                    # The search index only exists in a static build
+                    cb.featured_or_all(posts), all_tags, root="/", tag_href="/blog/tags/{slug}", search=False,
+                ))
+            else:
+                tag = next((t for t in all_tags if cb.safe_tag_slug(t) == name), None)
+                if tag is None:
+                    return None
+                html = cb.tag_page_template().render(**cb.tag_page_slots(tag, tag_to_posts[tag], root="/"))
+            return self.store(key, route_links(html))
+
+blog = DynamicBlog()
+
+def blog_response(kind: str, name: str = ""):
+    entry = blog.page(kind, name)
+    if entry is None:
+        abort(404)
+    resp = make_response(entry[0])
+    resp.set_etag(entry[1])
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp.make_conditional(request)
+
+# ==============================
+# Routes
+# ==============================
 
 # Define routes for your website
 @app.route('/')
 def home():
-    return render_template('index.html')
+    return cached_page('index.html')
 
 @app.route('/about')
 def about():
-    return render_template('about.html')
+    return cached_page('about.html')
 
 @app.route('/portfolio')
 def portfolio():
-    return render_template('portfolio.html')
+    return cached_page('portfolio.html')
+
+@app.route('/poetry')
+def poetry():
+    return cached_page('poetry.html')
+
+@app.route('/photos')
+def photos():
+    return cached_page('photos.html')
+
+@app.route('/blog')
+def blog_index():
+    return blog_response("index")
+
+@app.route('/blog/<slug>')
+def blog_post(slug):
+    return blog_response("post", slug)
+
+@app.route('/blog/tags/<tag>')
+def blog_tag(tag):
+    return blog_response("tag", tag)
+
+@app.route('/blog/media/<path:filename>')
+def blog_media(filename):
+    return send_from_directory(cb.OBSIDIAN_ROOT, filename, max_age=3600)
+
+@app.route('/Attachments/<path:filename>')
+def attachments(filename):
+    return send_from_directory(os.path.join(app.root_path, ATTACHMENTS_DIR), filename, max_age=3600)
+
+@app.route('/static/blog.<digest>.css')
+def blog_stylesheet(digest):
+    """The fingerprinted blog stylesheet, straight from create_blog.py (no static build needed)."""
+    if f"blog.{digest}.css" != cb.blog_stylesheet_name():
+        abort(404)
+    resp = Response(cb.blog_stylesheet_css(), mimetype="text/css")
+    resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return resp
+
+# ==============================
+# MAIN
+# ==============================
+
+class NoDelayHandler(WSGIHandler):
+    """Keep-alive responses go out as headers + body writes; without
+    TCP_NODELAY the second one waits ~40 ms on the client's delayed ACK."""
+
+    def handle(self):
+        try:
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError:
+            pass
+        super().handle()
+
+def serve_production(host: str = HOST, port: int = PORT, pool_size: int = POOL_SIZE, access_log: bool = False):
+    """gevent WSGIServer with a bounded greenlet pool."""
+    server = WSGIServer((host, port), app, spawn=Pool(pool_size), handler_class=NoDelayHandler,
+                        log="default" if access_log else None)
+    print(f"Serving on http://{host}:{port}/ (gevent, pool={pool_size})...")
+    server.serve_forever()
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Run the site's Flask app.")
+    ap.add_argument("--production", action="store_true",
+                    help="serve with gevent's WSGIServer instead of the debug server")
+    ap.add_argument("--host", default=HOST)
+    ap.add_argument("--port", type=int, default=PORT)
+    ap.add_argument("--pool", type=int, default=POOL_SIZE, metavar="N",
+                    help=f"max concurrent requests in production mode (default: {POOL_SIZE})")
+    ap.add_argument("--templates", default=None, metavar="DIR",
+                    help=f"template folder (default: {TEMPLATE_DIR})")
+    ap.add_argument("--access-log", action="store_true",
+                    help="log every request in production mode")
+    ap.add_argument("--no-page-cache", action="store_true",
+                    help="call render_template on every request")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    global PAGE_CACHE_ENABLED
+    args = parse_args(argv)
+    if args.templates:
+        app.template_folder = os.path.abspath(args.templates)
+    if args.no_page_cache:
+        PAGE_CACHE_ENABLED = False
+
+    if args.production:
+        serve_production(args.host, args.port, args.pool, args.access_log)
+    else:
+        app.run(host=args.host, port=args.port, debug=True)
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    main()
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Requests/second for apps.py before and after the production mode:
+
+  before   Flask debug-style server (threaded werkzeug), render_template per request
+  after    gevent WSGIServer + memoized pages
+  after304 same, but clients revalidate with If-None-Match (conditional GET)
+
+    python bench_apps.py --seconds 5 --clients 16
+"""
+
+import os
+import time
+import argparse
+import threading
+import http.client
+import multiprocessing as mp
+
+import apps
+
+HOST = "127.0.0.1"
+PATHS = ("/", "/about")
+
+# ==============================
+# Servers (each runs in its own process)
+# ==============================
+
+def run_before(port: int, templates: str):
+    apps.app.template_folder = templates
+    apps.PAGE_CACHE_ENABLED = False
+    apps.app.run(HOST, port, threaded=True, use_reloader=False)
+
+def run_after(port: int, templates: str, pool: int):
+    apps.app.template_folder = templates
+    apps.serve_production(HOST, port, pool)
+
+def wait_until_up(port: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(HOST, port, timeout=1)
+            conn.request("GET", PATHS[0])
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+# ==============================
+# Load generator
+# ==============================
+
+def client(port: int, stop_at: float, conditional: bool, counts: list, idx: int):
+    conn = http.client.HTTPConnection(HOST, port, timeout=10)
+    etags = {}
+    ok = errors = 0
+    i = 0
+    while time.perf_counter() < stop_at:
+        path = PATHS[i % len(PATHS)]
+        i += 1
+        headers = {}
+        if conditional and path in etags:
+            headers["If-None-Match"] = etags[path]
+        try:
+            conn.request("GET", path, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            continue
+        if resp.status in (200, 304):
+            ok += 1
+            if resp.getheader("ETag"):
+                etags[path] = resp.getheader("ETag")
+        else:
+            errors += 1
+        if resp.will_close:
+            conn.close()
+    conn.close()
+    counts[idx] = (ok, errors)
+
+def measure(port: int, seconds: float, clients: int, conditional: bool) -> tuple[float, int]:
+    counts = [(0, 0)] * clients
+    stop_at = time.perf_counter() + seconds
+    threads = [
+        threading.Thread(target=client, args=(port, stop_at, conditional, counts, i))
+        for i in range(clients)
+    ]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    ok = sum(c[0] for c in counts)
+    errors = sum(c[1] for c in counts)
+    return ok / elapsed, errors
+
+def bench(name: str, target, args: tuple, port: int, opts, conditional: bool = False) -> float:
+    proc = mp.Process(target=target, args=(port, *args), daemon=True)
+    proc.start()
+    try:
+        wait_until_up(port)
+        measure(port, min(1.0, opts.seconds), opts.clients, conditional)  # warm-up
+        rps, errors = measure(port, opts.seconds, opts.clients, conditional)
+    finally:
+        proc.terminate()
+        proc.join()
+    print(f"{name:<9} {rps:10,.0f} req/s   ({errors} errors)")
+    return rps
+
+# ==============================
+# MAIN
+# ==============================
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--clients", type=int, default=16)
+    ap.add_argument("--pool", type=int, default=apps.POOL_SIZE)
+    ap.add_argument("--port", type=int, default=5055)
+    ap.add_argument("--templates", default=os.path.dirname(os.path.abspath(__file__)),
+                    help="folder holding index.html/about.html (default: the site root)")
+    opts = ap.parse_args()
+
+    templates = os.path.abspath(opts.templates)
+    print(f"{opts.clients} clients x {opts.seconds:g}s, paths {', '.join(PATHS)}")
+
+    before = bench("before", run_before, (templates,), opts.port, opts)
+    after = bench("after", run_after, (templates, opts.pool), opts.port + 1, opts)
+    after304 = bench("after304", run_after, (templates, opts.pool), opts.port + 2, opts, conditional=True)
+
+    print(f"speedup: {after / before:.1f}x (200s), {after304 / before:.1f}x (304s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Build benchmark: generates a synthetic Obsidian vault shaped like
+blogs/blog_posts/Blog Posts/<folder>/<file>.md (plus a matching
+blog_index.csv), times each create_blog.py stage on it and reports JSON,
+so runs can be diffed for regressions.
+
+    python bench_build.py --posts 2000 --paragraphs 12 --images 2 --tags 40 --output bench.json
+
+Stages (serial, best of --repeat): index_load, read, frontmatter_parse,
+image_rewrite, markdown_render, page_wrap, tag_aggregation, write. Unless
+--no-full-build is given, a cold and a warm (incremental, nothing changed)
+run of create_blog.main() on the same site are timed too.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import shutil
+import struct
+import argparse
+import platform
+import tempfile
+import contextlib
+from pathlib import Path
+
+import create_blog as cb
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua patient clinical trial"
+).split()
+
+STAGES = ("index_load", "read", "frontmatter_parse", "image_rewrite",
+          "markdown_render", "page_wrap", "tag_aggregation", "write")
+
+# ==============================
+# Synthetic vault
+# ==============================
+
+def png_bytes(width: int, height: int, rng: random.Random) -> bytes:
+    """A noisy RGB PNG (stdlib only), so image derivatives have real work to do."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    raw = b"".join(b"\x00" + rng.randbytes(width * 3) for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw, 1))
+        + chunk(b"IEND", b"")
+    )
+
+def synthetic_post(rng: random.Random, i: int, tags: list[str], paragraphs: int, images: list[str]) -> str:
+    post_tags = rng.sample(tags, min(len(tags), rng.randint(1, 4)))
+    fm = (
+        "---\n"
+        + "tags:\n" + "".join(f"  - {t}\n" for t in post_tags)
+        + f"date: 20{rng.randint(10, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}\n"
+        + f"Tagline: {' '.join(rng.choices(WORDS, k=10))}\n"
+        + "Published: Y\n"
+        + f"Featured: {'Y' if rng.random() < 0.2 else 'N'}\n"
+        + f"Desired URL Name: post-{i}\n"
+        + "---\n"
+    )
+
+    parts = [f"# {' '.join(rng.choices(WORDS, k=5)).title()} {i}"]
+    for p in range(paragraphs):
+        if p and p % 4 == 0:
+            parts.append(f"## {' '.join(rng.choices(WORDS, k=3)).title()}")
+        parts.append(" ".join(rng.choices(WORDS, k=rng.randint(40, 120))) + ".")
+        if p < len(images):
+            # Mix Obsidian wikilinks and plain Markdown images, like the real vault
+            parts.append(f"![[{images[p]}]]" if p % 2 == 0 else f"![Figure]({images[p]})")
+    return fm + "\n\n".join(parts) + "\n"
+
+def make_site(site: Path, n_posts: int, paragraphs: int, n_images: int, n_tags: int,
+              image_px: int, seed: int) -> dict:
+    """
+    Writes <site>/blogs/blog_posts/Blog Posts/<folder>/<file>.md (+ images)
+    and <site>/blogs/blog_index.csv. The posts' properties also carry the
+    index columns, so --index frontmatter works on the same vault.
+    """
+    import csv
+
+    rng = random.Random(seed)
+    obs_root = site / "blogs" / "blog_posts" / "Blog Posts"
+    tags = [f"Topic_{i}" for i in range(n_tags)]
+    rows = []
+    md_bytes = img_bytes = 0
+
+    for i in range(n_posts):
+        folder = obs_root / f"Post {i:05d}"
+        folder.mkdir(parents=True, exist_ok=True)
+        images = []
+        for j in range(n_images):
+            name = f"Pasted image {i:05d}{j:02d}.png"
+            data = png_bytes(image_px, image_px * 2 // 3, rng)
+            (folder / name).write_bytes(data)
+            img_bytes += len(data)
+            images.append(name)
+
+        text = synthetic_post(rng, i, tags, paragraphs, images)
+        (folder / f"Post {i}.md").write_text(text, encoding="utf-8")
+        md_bytes += len(text.encode("utf-8"))
+        rows.append({
+            "File Name": f"Post {i}",
+            "Folder Name": folder.name,
+            "Desired URL Name": f"post-{i}",
+            "Published (Y/N)": "Y",
+            "Featured (Y/N)": "Y" if i % 5 == 0 else "N",
+        })
+
+    with (site / "blogs" / "blog_index.csv").open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=cb.INDEX_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    (site / "static").mkdir(exist_ok=True)
+    return {"markdown_bytes": md_bytes, "image_bytes": img_bytes}
+
+def point_at_site(site: Path):
+    """Redirect create_blog.py's CONFIG paths into the synthetic site."""
+    cb.INDEX_SOURCE = "csv"
+    cb.CSV_PATH = str(site / "blogs" / "blog_index.csv")
+    cb.OBSIDIAN_ROOT = str(site / "blogs" / "blog_posts" / "Blog Posts")
+    cb.POST_OUTPUT_DIR = str(site / "blogs" / "generated")
+    cb.TAG_OUTPUT_DIR = str(site / "blogs" / "tags")
+    cb.BLOG_INDEX_OUTPUT = str(site / "blog.html")
+    cb.PREVIEW_JSON_OUTPUT = str(site / "static" / "blog_posts.json")
+    cb.STATIC_DIR = str(site / "static")
+    cb.REBUILD_STAMP = str(site / ".rebuild-stamp")
+
+# ==============================
+# Stage timings
+# ==============================
+
+def run_stages(index_source: str, backend: str, out_dir: Path) -> tuple[dict, dict]:
+    """One serial pass through the build pipeline; returns (seconds per stage, counts)."""
+    obs_root = Path(cb.OBSIDIAN_ROOT)
+    t = dict.fromkeys(STAGES, 0.0)
+
+    t0 = time.perf_counter()
+    published = list(cb.iter_published(cb.load_index(index_source, obs_root), obs_root))
+    t["index_load"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    sources = [(folder_name, slug, featured, md_path, cb.read_text(md_path))
+               for _, _, folder_name, slug, featured, md_path in published]
+    t["read"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    headers = [cb.parse_post_header(raw_md) for *_, raw_md in sources]
+    t["frontmatter_parse"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    web_md = []
+    for (folder_name, *_, raw_md), header in zip(sources, headers):
+        web_md.append((
+            cb.obsidian_md_to_web_md(raw_md[header.body_offset:], folder_name),
+            cb.extract_first_image_src(raw_md, folder_name, "site_root"),
+            cb.extract_first_image_src(raw_md, folder_name, "tag_page"),
+        ))
+    t["image_rewrite"] = time.perf_counter() - t0
+
+    render = cb.markdown_renderer(backend)
+    t0 = time.perf_counter()
+    bodies = [render(md) for md, _, _ in web_md]
+    t["markdown_render"] = time.perf_counter() - t0
+
+    root = cb.REL_TO_SITE_ROOT_FROM_POST + "/"
+    template = cb.post_page_template()
+    t0 = time.perf_counter()
+    pages = {}
+    posts = []
+    for (folder_name, slug, featured, md_path, _), header, (_, hero, hero_tag), body in zip(
+        sources, headers, web_md, bodies
+    ):
+        tags = cb.prop_list(header.props, "tags")
+        date_str = cb.prop_str(header.props, "date")
+        tagline = cb.prop_str(header.props, "tagline")
+        title = header.title or slug
+        pages[f"generated/{slug}.html"] = template.render(
+            title=title, body=body, root=root,
+            header_block=cb.make_post_header_block(tags=tags, title=title, date_str=date_str, root=root),
+        )
+        posts.append(cb.Post(
+            title=title, slug=slug, folder=folder_name, source_md=str(md_path), featured=featured,
+            tags_raw=tags, tags_pretty=[cb.prettify_tag(x) for x in tags], date=date_str,
+            tagline=tagline, synopsis=cb.make_synopsis(tagline, body),
+            url_site_root=f"blogs/generated/{slug}.html", url_from_tag_page=f"../generated/{slug}.html",
+            hero_image=hero, hero_image_tag_page=hero_tag, hero_image_info=None,
+        ))
+    t["page_wrap"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    all_tags, tag_to_posts = cb.group_by_tag(posts)
+    pages["blog.html"] = cb.blog_index_template().render(
+        **cb.blog_index_slots(cb.featured_or_all(posts), all_tags))
+    tag_template = cb.tag_page_template()
+    for tag, tag_posts in tag_to_posts.items():
+        pages[f"tags/{cb.safe_tag_slug(tag)}.html"] = tag_template.render(**cb.tag_page_slots(tag, tag_posts))
+    t["tag_aggregation"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for rel, html in pages.items():
+        cb.write_text(out_dir / rel, html)
+    cb.write_text(out_dir / "blog.json", json.dumps([p.to_dict() for p in posts], indent=2))
+    t["write"] = time.perf_counter() - t0
+
+    return t, {"posts": len(posts), "tags": len(all_tags), "pages": len(pages) + 1}
+
+def time_full_build(argv: list[str]) -> float:
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        cb.main(argv)
+    return time.perf_counter() - t0
+
+# ==============================
+# MAIN
+# ==============================
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--posts", type=int, default=500)
+    ap.add_argument("--paragraphs", type=int, default=10, help="paragraphs per post (sets post size)")
+    ap.add_argument("--images", type=int, default=1, help="images per post")
+    ap.add_argument("--image-px", type=int, default=640, help="generated image width in pixels")
+    ap.add_argument("--tags", type=int, default=30, help="distinct tags across the vault")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--index", choices=("csv", "frontmatter"), default="csv")
+    ap.add_argument("--markdown-backend", choices=sorted(cb.MARKDOWN_BACKENDS), default=cb.MARKDOWN_BACKEND)
+    ap.add_argument("--jobs", "-j", type=int, default=1, help="--jobs for the full builds")
+    ap.add_argument("--no-full-build", action="store_true", help="only time the stages")
+    ap.add_argument("--site", default=None, help="generate the vault here and keep it (default: temp dir)")
+    ap.add_argument("--output", "-o", default=None, help="write the JSON report here (default: stdout)")
+    args = ap.parse_args()
+
+    site = Path(args.site) if args.site else Path(tempfile.mkdtemp(prefix="bench_build_"))
+    try:
+        t0 = time.perf_counter()
+        sizes = make_site(site, args.posts, args.paragraphs, args.images, args.tags, args.image_px, args.seed)
+        gen_s = time.perf_counter() - t0
+        print(f"[INFO] Vault: {args.posts} posts, {sizes['markdown_bytes'] / 1e6:.1f} MB Markdown, "
+              f"{sizes['image_bytes'] / 1e6:.1f} MB images ({gen_s:.1f}s) in {site}", file=sys.stderr)
+        point_at_site(site)
+
+        best = dict.fromkeys(STAGES, float("inf"))
+        for _ in range(args.repeat):
+            times, counts = run_stages(args.index, args.markdown_backend, site / "bench_out")
+            best = {k: min(best[k], v) for k, v in times.items()}
+        total = sum(best.values())
+
+        report = {
+            "params": {k: getattr(args, k) for k in
+                       ("posts", "paragraphs", "images", "image_px", "tags", "seed", "repeat",
+                        "index", "markdown_backend", "jobs")},
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "image_formats": list(cb.available_image_formats() or ()),
+            },
+            "corpus": {**sizes, **counts},
+            "stages": {
+                name: {
+                    "seconds": round(s, 6),
+                    "per_post_ms": round(s * 1000 / max(1, counts["posts"]), 4),
+                    "share": round(s / total, 4) if total else 0.0,
+                }
+                for name, s in best.items()
+            },
+            "stages_total_seconds": round(total, 6),
+        }
+
+        if not args.no_full_build:
+            argv = ["--index", args.index, "--markdown-backend", args.markdown_backend, "--jobs", str(args.jobs)]
+            report["full_build"] = {
+                "cold_seconds": round(time_full_build(argv), 6),
+                "warm_seconds": round(time_full_build(argv), 6),
+            }
+
+        for name, s in report["stages"].items():
+            print(f"{name:<18} {s['seconds'] * 1000:10.1f} ms  {s['per_post_ms']:8.3f} ms/post  "
+                  f"{s['share'] * 100:5.1f}%", file=sys.stderr)
+        if "full_build" in report:
+            fb = report["full_build"]
+            print(f"{'full build':<18} cold {fb['cold_seconds']:.2f}s, warm {fb['warm_seconds']:.2f}s",
+                  file=sys.stderr)
+
+        text = json.dumps(report, indent=2)
+        if args.output:
+            Path(args.output).write_text(text + "\n", encoding="utf-8")
+            print(f"[OK] Wrote: {args.output}", file=sys.stderr)
+        else:
+            print(text)
+    finally:
+        if not args.site:
+            shutil.rmtree(site, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Microbenchmark: single-pass parse_post_header() vs the old multi-regex
+frontmatter functions (parse_obsidian_properties + strip_frontmatter +
+title search), on a synthetic corpus of Obsidian posts.
+
+    python bench_frontmatter.py --posts 10000 --repeat 5
+"""
+
+import re
+import time
+import random
+import argparse
+
+from create_blog import parse_post_header, prop_list, prop_str
+
+# ==============================
+# Old implementation (kept here only for comparison)
+# ==============================
+
+def legacy_parse_obsidian_properties(md_text: str) -> dict:
+    props = {}
+    m = re.match(r"^\s*---\s*\n(.*?)\n---\s*\n", md_text, flags=re.S)
+    if not m:
+        return props
+
+    fm = m.group(1)
+
+    tags_inline = re.search(r"(?m)^\s*tags\s*:\s*\[(.*?)\]\s*$", fm)
+    if tags_inline:
+        raw = tags_inline.group(1)
+        props["tags"] = [t.strip().strip("'\"") for t in raw.split(",") if t.strip()]
+
+    tags_block = re.search(r"(?ms)^\s*tags\s*:\s*\n((?:\s*-\s*.*\n)+)", fm)
+    if tags_block:
+        tags = []
+        for line in tags_block.group(1).splitlines():
+            mm = re.match(r"^\s*-\s*(.+)\s*$", line)
+            if mm:
+                tags.append(mm.group(1).strip().strip("'\""))
+        props["tags"] = tags
+
+    date_m = re.search(r"(?m)^\s*date\s*:\s*(.+)\s*$", fm)
+    if date_m:
+        props["date"] = date_m.group(1).strip().strip("'\"")
+
+    tagl_m = re.search(r"(?mi)^\s*tagline\s*:\s*(.+)\s*$", fm)
+    if tagl_m:
+        props["tagline"] = tagl_m.group(1).strip().strip("'\"")
+
+    return props
+
+def legacy_strip_frontmatter(md_text: str) -> str:
+    return re.sub(r"^\s*---\s*\n.*?\n---\s*\n", "", md_text, flags=re.S)
+
+def legacy_header(md_text: str):
+    props = legacy_parse_obsidian_properties(md_text)
+    content_md = legacy_strip_frontmatter(md_text)
+    title_match = re.search(r"^\s*#\s+(.+)\s*$", content_md, flags=re.M)
+    title = title_match.group(1).strip() if title_match else None
+    return props, content_md, title
+
+def new_header(md_text: str):
+    h = parse_post_header(md_text)
+    return h.props, md_text[h.body_offset:], h.title
+
+# ==============================
+# Synthetic corpus
+# ==============================
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua patient clinical trial"
+).split()
+
+TAGS = [f"Tag_{i}" for i in range(60)]
+
+def synthetic_post(rng: random.Random) -> str:
+    tags = rng.sample(TAGS, rng.randint(1, 5))
+    if rng.random() < 0.2:
+        tags_fm = "tags: [" + ", ".join(tags) + "]\n"
+    else:
+        tags_fm = "tags:\n" + "".join(f"  - {t}\n" for t in tags)
+
+    fm = (
+        "---\n"
+        + tags_fm
+        + f"date: 20{rng.randint(10, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}\n"
+        + f"Tagline: {' '.join(rng.choices(WORDS, k=12))}\n"
+        + "author: Anand Lal\n"
+        + f"image: Pasted image {rng.randint(10**13, 10**14)}.png\n"
+        + f"draft: {rng.choice(['true', 'false'])}\n"
+        + "---\n"
+    )
+
+    paras = []
+    for _ in range(rng.randint(3, 20)):
+        paras.append(" ".join(rng.choices(WORDS, k=rng.randint(30, 120))))
+    body = "\n\n".join(paras)
+    if rng.random() < 0.8:
+        body = f"# {' '.join(rng.choices(WORDS, k=5))}\n\n" + body
+
+    return fm + body
+
+def make_corpus(n: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    return [synthetic_post(rng) for _ in range(n)]
+
+# ==============================
+# Bench
+# ==============================
+
+def best_of(fn, corpus: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for doc in corpus:
+            fn(doc)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def check_agreement(corpus: list[str]) -> int:
+    mismatches = 0
+    for doc in corpus:
+        old_props, old_body, old_title = legacy_header(doc)
+        new_props, new_body, new_title = new_header(doc)
+        same = (
+            old_props.get("tags", []) == prop_list(new_props, "tags")
+            and old_props.get("date", "") == prop_str(new_props, "date")
+            and old_props.get("tagline", "") == prop_str(new_props, "tagline")
+            and old_body == new_body
+            and old_title == new_title
+        )
+        if not same:
+            mismatches += 1
+    return mismatches
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--posts", type=int, default=10000)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    corpus = make_corpus(args.posts, args.seed)
+    total_kb = sum(len(d) for d in corpus) / 1024
+    print(f"Corpus: {args.posts} posts, {total_kb:,.0f} KB")
+
+    mismatches = check_agreement(corpus)
+    print(f"Agreement on tags/date/tagline/body/title: {args.posts - mismatches}/{args.posts}")
+
+    t_old = best_of(legacy_header, corpus, args.repeat)
+    t_new = best_of(new_header, corpus, args.repeat)
+
+    per_old = t_old / args.posts * 1e6
+    per_new = t_new / args.posts * 1e6
+    print(f"legacy (5 regex scans + strip + title): {t_old * 1000:8.1f} ms  ({per_old:6.1f} us/post)")
+    print(f"parse_post_header (single pass):        {t_new * 1000:8.1f} ms  ({per_new:6.1f} us/post)")
+    print(f"speedup: {t_old / t_new:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Markdown backend benchmark: conformance of each backend against
+"python-markdown" and throughput, over the blog_posts corpus plus optional
+synthetic posts with tables, fenced code, headings, smart punctuation and
+image embeds. Conformance compares the final post page (render_post, with
+stand-in image derivatives so <picture> rewriting runs) as normalized
+tag/text structure, not just the Markdown output.
+
+    python bench_markdown.py --synthetic 500 --repeat 5
+"""
+
+import time
+import random
+import hashlib
+import difflib
+import argparse
+from pathlib import Path
+from urllib.parse import unquote
+from html.parser import HTMLParser
+
+from create_blog import (
+    MARKDOWN_BACKENDS, IMAGE_FORMATS, IMAGE_WIDTHS, IMAGE_EXTENSIONS, markdown_renderer,
+    parse_post_header, obsidian_md_to_web_md, local_image_refs, render_post, post_page_template, read_text,
+)
+
+REFERENCE = "python-markdown"
+DEFAULT_VAULT = Path(__file__).resolve().parent / "blog_posts" / "Blog Posts"
+
+# ==============================
+# Corpus
+# ==============================
+
+def stand_in_image(ref: str) -> dict:
+    """Derivative info shaped like build_image_derivatives' output (no files needed)."""
+    digest = hashlib.sha256(ref.encode("utf-8")).hexdigest()
+    return {
+        "hash": digest, "width": 1920, "height": 1080,
+        "variants": {fmt: [[w, f"{digest[:16]}-{w}.{IMAGE_EXTENSIONS[fmt]}"] for w in IMAGE_WIDTHS]
+                     for fmt in IMAGE_FORMATS},
+    }
+
+def make_job(raw: str, folder: str, name: str) -> dict:
+    """A render_post job, plus the post's Markdown as the renderers see it ("web_md")."""
+    return {
+        "raw_md": raw,
+        "md_path": f"{folder}/{name}.md",
+        "file_name": name,
+        "folder_name": folder,
+        "slug": name,
+        "featured": False,
+        "images": {ref: stand_in_image(ref) for ref in local_image_refs(raw, folder)},
+        "web_md": obsidian_md_to_web_md(raw[parse_post_header(raw).body_offset:], folder),
+    }
+
+def vault_corpus(vault: Path) -> list[dict]:
+    return [make_job(read_text(md_path), md_path.parent.name, md_path.stem)
+            for md_path in sorted(vault.glob("*/*.md"))]
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua patient clinical trial"
+).split()
+
+def sentence(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(8, 25))
+    if rng.random() < 0.3:
+        words[rng.randrange(len(words))] = f'"{rng.choice(WORDS)}"'
+    if rng.random() < 0.2:
+        words.insert(rng.randrange(len(words)), "--")
+    if rng.random() < 0.2:
+        words[rng.randrange(len(words))] = f"**{rng.choice(WORDS)}**"
+    if rng.random() < 0.2:
+        words[rng.randrange(len(words))] = f"[{rng.choice(WORDS)}](https://example.com/{rng.choice(WORDS)})"
+    return " ".join(words).capitalize() + "."
+
+def synthetic_post(rng: random.Random) -> str:
+    parts = [f"# {' '.join(rng.choices(WORDS, k=4)).title()}"]
+    for section in range(rng.randint(2, 6)):
+        parts.append(f"## Section {section + 1} {rng.choice(WORDS)}")
+        for _ in range(rng.randint(2, 5)):
+            parts.append(" ".join(sentence(rng) for _ in range(rng.randint(2, 6))))
+        kind = rng.random()
+        if kind < 0.25:
+            cols = rng.randint(2, 4)
+            rows = ["| " + " | ".join(rng.choices(WORDS, k=cols)) + " |",
+                    "|" + "---|" * cols]
+            rows += ["| " + " | ".join(rng.choices(WORDS, k=cols)) + " |" for _ in range(rng.randint(2, 6))]
+            parts.append("\n".join(rows))
+        elif kind < 0.45:
+            code = "\n".join(f"x_{i} = {rng.randint(0, 99)}  # {rng.choice(WORDS)}" for i in range(rng.randint(2, 8)))
+            parts.append(f"```python\n{code}\n```")
+        elif kind < 0.7:
+            parts.append("\n".join(f"- {sentence(rng)}" for _ in range(rng.randint(2, 6))))
+        else:
+            parts.append("\n".join(f"{i + 1}. {sentence(rng)}" for i in range(rng.randint(2, 5))))
+        if rng.random() < 0.3:
+            # Vault file names have spaces, which markdown-it percent-encodes
+            parts.append(f"![[{rng.choice(WORDS)} {section + 1}.png]]")
+    return "\n\n".join(parts) + "\n"
+
+# ==============================
+# Conformance
+# ==============================
+
+class StructureParser(HTMLParser):
+    """Flattens HTML to tags + attributes + whitespace-normalized text
+    (void tags as one item, URLs percent-decoded)."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.items = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = sorted((k, unquote(v) if k in ("href", "src") else v) for k, v in attrs)
+        self.items.append(f"<{tag}{''.join(f' {k}={v}' for k, v in attrs)}>")
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        self.items.append(f"</{tag}>")
+
+    def handle_data(self, data):
+        text = " ".join(data.split())
+        if text:
+            self.items.append(text)
+
+def structure(html: str) -> list[str]:
+    parser = StructureParser()
+    parser.feed(html)
+    parser.close()
+    return parser.items
+
+def post_page(job: dict, backend: str) -> str:
+    _, page_slots = render_post({**job, "markdown_backend": backend})
+    return post_page_template().render(**page_slots)
+
+def conformance(renderers: dict, corpus: list[dict]) -> dict:
+    ref_structs = [structure(post_page(job, REFERENCE)) for job in corpus]
+    out = {}
+    for name in renderers:
+        if name == REFERENCE:
+            continue
+        same = 0
+        first_diff = None
+        for job, expected in zip(corpus, ref_structs):
+            got = structure(post_page(job, name))
+            if got == expected:
+                same += 1
+            elif first_diff is None:
+                first_diff = list(difflib.unified_diff(expected, got, REFERENCE, name, n=1, lineterm=""))[:12]
+        out[name] = (same, first_diff)
+    return out
+
+# ==============================
+# Throughput
+# ==============================
+
+def best_of(render, corpus: list[dict], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for job in corpus:
+            render(job["web_md"])
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--vault", default=str(DEFAULT_VAULT))
+    ap.add_argument("--synthetic", type=int, default=200, help="extra generated posts")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--backends", nargs="*", default=sorted(MARKDOWN_BACKENDS))
+    args = ap.parse_args()
+
+    corpus = vault_corpus(Path(args.vault))
+    n_vault = len(corpus)
+    rng = random.Random(args.seed)
+    corpus += [make_job(synthetic_post(rng), "Synthetic", f"synthetic-{i}") for i in range(args.synthetic)]
+    total_kb = sum(len(job["web_md"]) for job in corpus) / 1024
+    print(f"Corpus: {n_vault} vault posts + {args.synthetic} synthetic, {total_kb:,.0f} KB")
+
+    renderers = {}
+    for name in dict.fromkeys([REFERENCE, *args.backends]):
+        try:
+            renderers[name] = markdown_renderer(name)
+        except ImportError as e:
+            print(f"[SKIP] {name}: {e}")
+    if REFERENCE not in renderers:
+        raise SystemExit(f"{REFERENCE} is required as the reference backend")
+
+    for name, (same, diff) in conformance(renderers, corpus).items():
+        print(f"Conformance {name} vs {REFERENCE}: {same}/{len(corpus)} documents structurally identical")
+        if diff:
+            print("  first difference:")
+            for line in diff:
+                print(f"    {line}")
+
+    t_ref = None
+    for name, render in renderers.items():
+        t = best_of(render, corpus, args.repeat)
+        t_ref = t if name == REFERENCE else t_ref
+        mb_s = total_kb / 1024 / t
+        print(f"{name:<16} {t * 1000:8.1f} ms  {len(corpus) / t:8.0f} posts/s  {mb_s:6.2f} MB/s"
+              + (f"  ({t_ref / t:.2f}x)" if name != REFERENCE else ""))
+
+if __name__ == "__main__":
+    main()
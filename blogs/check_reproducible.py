@@ -0,0 +1,120 @@
+"""
+Reproducible-build check: runs create_blog.py twice from scratch into two
+scratch sites, a second apart, and asserts the generated trees are
+byte-identical (blogs/generated, blogs/tags, blog.html, blog/page and the
+blog stylesheet / blog_posts.json under static/).
+
+    python check_reproducible.py                 # the vault configured in create_blog.py
+    python check_reproducible.py --posts 200     # a synthetic vault (see bench_build.py)
+
+Exits with status 1 and lists the differing files when the builds differ.
+Timestamps come from source mtimes, so both builds must read the same
+checkout; set SOURCE_DATE_EPOCH to compare builds across machines.
+"""
+
+import io
+import sys
+import time
+import shutil
+import difflib
+import argparse
+import tempfile
+import contextlib
+from pathlib import Path
+
+import create_blog as cb
+
+CHECKED = ("blogs/generated", "blogs/tags", "blog.html", "blog", "static")
+# Build bookkeeping, not site content
+IGNORED = {cb.MANIFEST_NAME, ".rebuild-stamp"}
+BUILD_GAP = 1.1        # seconds between builds, so anything clock-based shows up
+MAX_REPORTED = 20
+
+def point_outputs_at(site: Path):
+    """Redirect create_blog.py's output paths into a scratch site; inputs stay as configured."""
+    cb.POST_OUTPUT_DIR = str(site / "blogs" / "generated")
+    cb.TAG_OUTPUT_DIR = str(site / "blogs" / "tags")
+    cb.BLOG_INDEX_OUTPUT = str(site / "blog.html")
+    cb.PREVIEW_JSON_OUTPUT = str(site / "static" / "blog_posts.json")
+    cb.STATIC_DIR = str(site / "static")
+    cb.REBUILD_STAMP = str(site / ".rebuild-stamp")
+
+def build_into(site: Path, argv: list[str]):
+    site.mkdir(parents=True)
+    point_outputs_at(site)
+    with contextlib.redirect_stdout(io.StringIO()):
+        cb.main(["--force", *argv])
+
+def output_files(site: Path) -> dict:
+    """{path relative to the site: Path} for every checked output file."""
+    files = {}
+    for rel in CHECKED:
+        root = site / rel
+        paths = [root] if root.is_file() else sorted(p for p in root.rglob("*") if p.is_file())
+        for path in paths:
+            if path.name not in IGNORED:
+                files[path.relative_to(site).as_posix()] = path
+    return files
+
+def first_difference(a: Path, b: Path) -> str:
+    try:
+        lines_a = a.read_text(encoding="utf-8").splitlines()
+        lines_b = b.read_text(encoding="utf-8").splitlines()
+    except UnicodeDecodeError:
+        return "  (binary files differ)"
+    diff = list(difflib.unified_diff(lines_a, lines_b, "build 1", "build 2", n=0, lineterm=""))
+    return "\n".join(f"  {line[:160]}" for line in diff[2:6])
+
+def compare(site_a: Path, site_b: Path) -> list[str]:
+    files_a, files_b = output_files(site_a), output_files(site_b)
+    problems = []
+    for rel in sorted(files_a.keys() | files_b.keys()):
+        if rel not in files_b:
+            problems.append(f"{rel}: only in build 1")
+        elif rel not in files_a:
+            problems.append(f"{rel}: only in build 2")
+        elif files_a[rel].read_bytes() != files_b[rel].read_bytes():
+            problems.append(f"{rel}: contents differ\n{first_difference(files_a[rel], files_b[rel])}")
+    print(f"[INFO] Compared {len(files_a.keys() | files_b.keys())} files")
+    return problems
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--posts", type=int, default=0,
+                    help="check a synthetic vault with this many posts instead of the configured one")
+    ap.add_argument("--images", type=int, default=1, help="images per synthetic post")
+    ap.add_argument("--jobs", "-j", type=int, default=1, help="--jobs for both builds")
+    ap.add_argument("--keep", action="store_true", help="keep the scratch sites")
+    args = ap.parse_args()
+
+    scratch = Path(tempfile.mkdtemp(prefix="check_reproducible_"))
+    try:
+        if args.posts:
+            import bench_build
+
+            vault = scratch / "vault"
+            bench_build.make_site(vault, args.posts, 4, args.images, 20, 160, seed=1)
+            bench_build.point_at_site(vault)
+
+        argv = ["--jobs", str(args.jobs)]
+        build_into(scratch / "build1", argv)
+        time.sleep(BUILD_GAP)
+        build_into(scratch / "build2", argv)
+
+        problems = compare(scratch / "build1", scratch / "build2")
+        if problems:
+            print(f"[FAIL] {len(problems)} output files differ between identical builds:")
+            for problem in problems[:MAX_REPORTED]:
+                print(f"  {problem}")
+            if len(problems) > MAX_REPORTED:
+                print(f"  ... and {len(problems) - MAX_REPORTED} more")
+            sys.exit(1)
+        print("[OK] Builds are byte-identical")
+    finally:
+        if args.keep:
+            print(f"[INFO] Scratch sites kept in {scratch}")
+        else:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
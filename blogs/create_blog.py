@@ -1,16 +1,44 @@
+import os
+import sys
 import re
 import json
+import html as html_lib
+import hashlib
+import sqlite3
+import time
+import unicodedata
+import argparse
 import datetime
+import threading
 from pathlib import Path
-
-import pandas as pd
-import markdown as md_lib
+from contextlib import contextmanager, nullcontext
+from urllib.parse import unquote as unquote_url
+from itertools import islice
+from functools import lru_cache
+from dataclasses import dataclass, fields
+from concurrent.futures import ProcessPoolExecutor
 
 # ==============================
 # CONFIG
 # ==============================
 
+# Post index: which posts exist, whether they're published/featured, their URL.
+#   "excel"       -> EXCEL_PATH (needs openpyxl)
+#   "csv"         -> CSV_PATH (same columns as the Excel sheet)
+#   "frontmatter" -> no index file; read Published / Featured / Desired URL Name
+#                    from each post's Obsidian properties
+INDEX_SOURCE = "excel"
+
+# Markdown -> HTML backend (see MARKDOWN_BACKENDS; pick per deployment with
+# blogs/bench_markdown.py):
+#   "python-markdown" -> Python-Markdown + extra/toc/smarty (needs markdown)
+#   "markdown-it"     -> markdown-it-py CommonMark + tables/anchors/typographer,
+#                        usually several times faster (needs markdown-it-py,
+#                        mdit-py-plugins)
+MARKDOWN_BACKEND = "python-markdown"
+
 EXCEL_PATH = r"C:\Users\nlal\Downloads\AL Website\blogs\blog_index.xlsx"
+CSV_PATH = r"C:\Users\nlal\Downloads\AL Website\blogs\blog_index.csv"
 
 # UPDATED per your note:
 # Posts and images live here:
@@ -25,9 +53,32 @@ TAG_OUTPUT_DIR = r"C:\Users\nlal\Downloads\AL Website\blogs\tags"
 # Main blog page output (site root):
 BLOG_INDEX_OUTPUT = r"C:\Users\nlal\Downloads\AL Website\blog.html"
 
+# Preview list for blog.js (same schema the old generate_blog_pages.py wrote):
+PREVIEW_JSON_OUTPUT = r"C:\Users\nlal\Downloads\AL Website\static\blog_posts.json"
+SYNOPSIS_MAX_CHARS = 200
+
+# Site static folder; the shared blog stylesheet (blog.<hash>.css) is written here:
+STATIC_DIR = r"C:\Users\nlal\Downloads\AL Website\static"
+BLOG_CSS_HASH_LEN = 10
+BLOG_CSS_NAME_RE = re.compile(rf"blog\.[0-9a-f]{{{BLOG_CSS_HASH_LEN}}}\.css")
+
+# Touched after every build; serve.py drops its hot-file cache when it changes
+REBUILD_STAMP = r"C:\Users\nlal\Downloads\AL Website\.rebuild-stamp"
+
 # From blogs/generated/<slug>.html -> site root is two levels up
 REL_TO_SITE_ROOT_FROM_POST = "../.."
 
+# Responsive image derivatives, written to blogs/generated/img/ (needs Pillow;
+# without it pages link the original attachments as before).
+IMAGE_SUBDIR = "img"
+IMAGE_WIDTHS = (480, 960, 1600)
+# <source> order for <picture>; "jpeg" is always the <img> fallback.
+IMAGE_FORMATS = ("avif", "webp", "jpeg")
+IMAGE_QUALITY = {"avif": 55, "webp": 78, "jpeg": 82}
+POST_IMAGE_SIZES = "(max-width: 980px) 100vw, 900px"
+CARD_IMAGE_SIZES = "(max-width: 900px) 100vw, 240px"
+TAG_IMAGE_SIZES = "(max-width: 900px) 100vw, 320px"
+
 ACCENT_RED = "#bb271a"
 HEADER_GRAY = "#f5f5f5"
 AUTHOR_NAME = "Anand Lal M.D."
@@ -37,6 +88,48 @@ DISCLAIMER_TEXT = (
     "Please address any medical questions or concerns with your clinician."
 )
 
+# Incremental builds: manifest lives next to blog.json.
+# Bump TEMPLATE_VERSION whenever the wrap_* / make_* HTML output changes,
+# so every page is regenerated on the next run.
+MANIFEST_NAME = "build_manifest.sqlite"
+MANIFEST_FORMAT = 1            # sqlite schema version (PRAGMA user_version)
+TEMPLATE_VERSION = 5
+
+# Posts are read, rendered and written BUILD_BATCH at a time; everything
+# after that streams out of the manifest, so memory doesn't grow with the vault.
+BUILD_BATCH = 256
+
+# Pagination: blog.html and blogs/tags/<tag>.html hold page 1; later pages go to
+# blog/page/<n>.html and blogs/tags/<tag>/page/<n>.html. 0 keeps one page.
+INDEX_PAGE_SIZE = 24
+TAG_PAGE_SIZE = 20
+
+# --watch: rebuild when the vault or the index file changes, serve the site
+# with serve.py and reload open pages. Obsidian saves in bursts; a rebuild
+# starts once no event has arrived for WATCH_DEBOUNCE seconds.
+WATCH_DEBOUNCE = 0.25
+WATCH_HOST = "localhost"
+WATCH_PORT = 8000
+# Matched against paths relative to the vault: .obsidian/, lock files, temp saves
+WATCH_IGNORE_RE = re.compile(r"(^|[\\/])(\.|~\$)|(~|\.tmp|\.swp)$")
+# watchdog event types that mean content changed ("closed" is closed-after-write).
+# "opened" / "closed_no_write" fire on plain reads, including the build's own.
+WATCH_EVENT_TYPES = {"created", "modified", "deleted", "moved", "closed"}
+
+# --trace / --profile output (build_trace.json, build_trace.folded, build.pstats):
+PROFILE_DIR = r"C:\Users\nlal\Downloads\AL Website\build_profile"
+PROFILE_TOP_N = 25             # pstats lines printed after a --profile build
+
+# Client-side search index: blogs/generated/search/index.json + term shards.
+# static/blog-search.js tokenizes queries the same way; bump
+# SEARCH_INDEX_VERSION whenever the tokenizer or file format changes.
+SEARCH_SUBDIR = "search"
+SEARCH_INDEX_NAME = "index.json"
+SEARCH_INDEX_VERSION = 2
+SEARCH_PREFIX_LEN = 2          # shard by the first N characters of a term
+SEARCH_HASH_LEN = 10
+SEARCH_FIELD_WEIGHTS = {"title": 3, "tagline": 2, "tags": 2, "body": 1}
+
 # ==============================
 # Helpers
 # ==============================
@@ -44,7 +137,8 @@ DISCLAIMER_TEXT = (
 def yn_to_bool(x) -> bool:
     if x is None:
         return False
-    return str(x).strip().upper() == "Y"
+    # "Y" from the spreadsheet; "true"/"yes" from Obsidian checkbox/text properties
+    return str(x).strip().upper() in ("Y", "YES", "TRUE")
 
 def safe_slug(s: str) -> str:
     s = str(s).strip()
@@ -61,11 +155,120 @@ def safe_tag_slug(tag: str) -> str:
     return tag
 
 def read_text(path: Path) -> str:
-    return path.read_text(encoding="utf-8", errors="replace")
-
-def write_text(path: Path, text: str):
+    text = path.read_text(encoding="utf-8", errors="replace")
+    count_file("read", path)
+    return text
+
+# Output layer: every generated file is streamed into a temp file next to it
+# and moved into place with os.replace, so serve.py never hands out half a
+# page. A file that already holds the same bytes is left alone, keeping its
+# mtime and with it browser, CDN and rsync caches.
+WRITE_COUNTS = {"written": 0, "unchanged": 0, "current": 0}   # current: skipped via the manifest
+REPLACE_RETRIES = 5             # os.replace fails on Windows while a reader has the file open
+
+def stream_to_temp(path: Path, chunks) -> tuple[Path, int, bytes]:
+    """Writes str chunks (UTF-8) beside `path`. Returns (temp path, size, sha256 digest)."""
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(text, encoding="utf-8")
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with tmp_path.open("wb") as f:
+            for chunk in chunks:
+                data = chunk.encode("utf-8")
+                h.update(data)
+                size += len(data)
+                f.write(data)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return tmp_path, size, h.digest()
+
+def same_bytes(path: Path, size: int, digest: bytes) -> bool:
+    try:
+        if path.stat().st_size != size:
+            return False
+        h = hashlib.sha256()
+        with path.open("rb") as f:
+            while block := f.read(1 << 20):
+                h.update(block)
+    except FileNotFoundError:
+        return False
+    return h.digest() == digest
+
+def replace_file(tmp_path: Path, path: Path):
+    for attempt in range(REPLACE_RETRIES):
+        try:
+            os.replace(tmp_path, path)
+            return
+        except PermissionError:
+            if attempt == REPLACE_RETRIES - 1:
+                tmp_path.unlink(missing_ok=True)
+                raise
+            time.sleep(0.05 * (attempt + 1))
+
+def write_chunks(path: Path, chunks) -> bool:
+    """
+    Writes an iterable of str to `path` unless it already holds exactly
+    those bytes. Returns whether the file changed.
+    """
+    tmp_path, size, digest = stream_to_temp(path, chunks)
+    if same_bytes(path, size, digest):
+        tmp_path.unlink()
+        WRITE_COUNTS["unchanged"] += 1
+        return False
+    replace_file(tmp_path, path)
+    WRITE_COUNTS["written"] += 1
+    count_bytes("written", size)
+    return True
+
+def write_text(path: Path, text: str) -> bool:
+    return write_chunks(path, (text,))
+
+def json_array_chunks(items, indent: int):
+    """Yields json.dumps(list(items), indent=indent) piece by piece."""
+    pad = " " * indent
+    first = True
+    for item in items:
+        yield "[\n" if first else ",\n"
+        yield pad + json.dumps(item, indent=indent).replace("\n", "\n" + pad)
+        first = False
+    yield "[]" if first else "\n]"
+
+def batched(iterable, n: int):
+    it = iter(iterable)
+    while batch := list(islice(it, n)):
+        yield batch
+
+def peak_rss_bytes() -> tuple[int, int] | None:
+    """(this process, largest finished child process) peak resident set size, or None if unknown."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                    "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage",
+                    "PagefileUsage", "PeakPagefileUsage",
+                )
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        try:
+            ok = ctypes.windll.psapi.GetProcessMemoryInfo(
+                ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb)
+        except (AttributeError, OSError):
+            return None
+        return (counters.PeakWorkingSetSize, 0) if ok else None
+
+    scale = 1 if sys.platform == "darwin" else 1024   # ru_maxrss is KiB on Linux, bytes on macOS
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale)
 
 def find_markdown_file(folder_path: Path, file_base: str) -> Path | None:
     if not folder_path.exists() or not folder_path.is_dir():
@@ -82,10 +285,583 @@ def find_markdown_file(folder_path: Path, file_base: str) -> Path | None:
     candidates = list(folder_path.glob("*.md"))
     return candidates[0] if candidates else None
 
+# ==============================
+# Build instrumentation (--trace / --profile)
+# ==============================
+# Spans per stage and per post, plus byte/file counters. TRACE stays None
+# unless --trace or --profile is given: span() then hands back one shared
+# nullcontext and the counters return after a single check.
+
+class BuildTrace:
+    __slots__ = ("events", "counters", "stack", "pid")
+
+    def __init__(self):
+        self.events = []      # (name, category, stack path, start ns, duration ns, pid, args)
+        self.counters = {}
+        self.stack = []
+        self.pid = os.getpid()
+
+    @contextmanager
+    def span(self, name: str, category: str, args: dict):
+        self.stack.append(name)
+        path = tuple(self.stack)
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.events.append((name, category, path, start, time.perf_counter_ns() - start, self.pid, args))
+            self.stack.pop()
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self, events: list, counters: dict):
+        """Adds a worker's spans (nested under the current span) and counters."""
+        prefix = tuple(self.stack)
+        self.events.extend((e[0], e[1], prefix + e[2], *e[3:]) for e in events)
+        for name, n in counters.items():
+            self.count(name, n)
+
+    def stage_totals(self) -> dict:
+        """{(category, name): [calls, total ns]} in first-seen order."""
+        totals = {}
+        for name, category, _, start, dur, _, _ in sorted(self.events, key=lambda e: e[3]):
+            entry = totals.setdefault((category, name), [0, 0])
+            entry[0] += 1
+            entry[1] += dur
+        return totals
+
+    def chrome_trace(self) -> dict:
+        """Trace Event Format; opens in chrome://tracing, Perfetto and speedscope."""
+        origin = min((e[3] for e in self.events), default=0)
+        events = [
+            {"name": "process_name", "ph": "M", "pid": pid, "tid": pid,
+             "args": {"name": "build" if pid == self.pid else f"worker {pid}"}}
+            for pid in sorted({e[5] for e in self.events})
+        ]
+        events += [
+            {"name": name, "cat": category, "ph": "X", "pid": pid, "tid": pid,
+             "ts": (start - origin) / 1000, "dur": dur / 1000, "args": args}
+            for name, category, _, start, dur, pid, args in self.events
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"counters": self.counters}}
+
+    def folded_stacks(self) -> str:
+        """Self time per stack in microseconds, as flamegraph.pl / speedscope "collapsed" input."""
+        self_ns = {}
+        for _, _, path, _, dur, _, _ in self.events:
+            self_ns[path] = self_ns.get(path, 0) + dur
+            if len(path) > 1:
+                self_ns[path[:-1]] = self_ns.get(path[:-1], 0) - dur
+        return "".join(f"{';'.join(path)} {ns // 1000}\n" for path, ns in sorted(self_ns.items()) if ns > 0)
+
+TRACE: BuildTrace | None = None
+NULL_SPAN = nullcontext()
+
+def span(name: str, category: str = "stage", **args):
+    if TRACE is None:
+        return NULL_SPAN
+    return TRACE.span(name, category, args)
+
+def count_bytes(kind: str, n: int):
+    """kind: "read" or "written"."""
+    if TRACE is not None:
+        TRACE.count(f"bytes_{kind}", n)
+        TRACE.count(f"files_{kind}", 1)
+
+def count_file(kind: str, path: Path):
+    if TRACE is not None:
+        count_bytes(kind, path.stat().st_size)
+
+def write_build_profile(trace: BuildTrace, profiler, out_dir: Path):
+    """Prints the span summary and writes the trace (and pstats) files."""
+    totals = trace.stage_totals()
+    print("[INFO] Build timings:")
+    for (category, name), (calls, total) in totals.items():
+        if category == "stage":
+            print(f"[INFO]   {name:<16} {total / 1e6:10.1f} ms")
+    for (category, name), (calls, total) in totals.items():
+        if category != "stage":
+            print(f"[INFO]   {name:<16} {total / 1e6:10.1f} ms total, {calls} x {total / 1e6 / calls:.2f} ms")
+    for name, n in sorted(trace.counters.items()):
+        print(f"[INFO]   {name:<16} {n:>12,}")
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    trace_path = out_dir / "build_trace.json"
+    trace_path.write_text(json.dumps(trace.chrome_trace()), encoding="utf-8")
+    print(f"[OK] Wrote: {trace_path}")
+    folded_path = out_dir / "build_trace.folded"
+    folded_path.write_text(trace.folded_stacks(), encoding="utf-8")
+    print(f"[OK] Wrote: {folded_path}")
+
+    if profiler is not None:
+        import pstats
+
+        stats_path = out_dir / "build.pstats"
+        profiler.dump_stats(stats_path)
+        print(f"[OK] Wrote: {stats_path} (main process only; see build_trace.json for workers)")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(PROFILE_TOP_N)
+
+# ==============================
+# Post index sources
+# ==============================
+# Every backend returns a list of rows (dicts keyed by INDEX_COLUMNS, values as str).
+# Backend dependencies are imported only when that backend is selected.
+# "frontmatter" rows also carry ROW_HEADER: (sha256 of the file, its PostHeader),
+# so a file that hasn't changed since the scan isn't parsed again to render it.
+
+INDEX_COLUMNS = ["File Name", "Folder Name", "Desired URL Name", "Published (Y/N)", "Featured (Y/N)"]
+ROW_HEADER = "parsed_header"
+
+def check_index_columns(header, where: str):
+    for c in INDEX_COLUMNS:
+        if c not in header:
+            raise ValueError(f"Missing required column in {where}: {c}")
+
+def cell_to_str(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def load_index_excel(path: Path) -> list[dict]:
+    from openpyxl import load_workbook
+
+    if not path.exists():
+        raise FileNotFoundError(f"Excel file not found: {path}")
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [cell_to_str(h).strip() for h in next(rows, ())]
+        check_index_columns(header, "Excel")
+        out = []
+        for values in rows:
+            if values is None or all(v is None for v in values):
+                continue
+            rec = dict(zip(header, values))
+            out.append({c: cell_to_str(rec.get(c)) for c in INDEX_COLUMNS})
+        return out
+    finally:
+        wb.close()
+
+def load_index_csv(path: Path) -> list[dict]:
+    import csv
+
+    if not path.exists():
+        raise FileNotFoundError(f"CSV file not found: {path}")
+
+    with path.open(newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        header = [h.strip() for h in (reader.fieldnames or [])]
+        check_index_columns(header, "CSV")
+        reader.fieldnames = header
+        return [
+            {c: (rec.get(c) or "") for c in INDEX_COLUMNS}
+            for rec in reader
+            if any((v or "").strip() for v in rec.values())
+        ]
+
+def load_index_frontmatter(obs_root: Path) -> list[dict]:
+    """
+    One row per <folder>/<file>.md in the vault, using the post's own properties:
+    ---
+    Published: Y
+    Featured: N
+    Desired URL Name: my-post
+    ---
+    """
+    out = []
+    for folder in sorted(obs_root.iterdir(), key=lambda p: p.name.lower()):
+        if not folder.is_dir() or folder.name.startswith("."):
+            continue
+        for md_path in sorted(folder.glob("*.md"), key=lambda p: p.name.lower()):
+            # Decoded exactly as stream_posts() does, so body_offset carries over
+            raw_bytes = md_path.read_bytes()
+            count_bytes("read", len(raw_bytes))
+            header = parse_post_header(raw_bytes.decode("utf-8", errors="replace"))
+            props = header.props
+            out.append({
+                "File Name": md_path.stem,
+                "Folder Name": folder.name,
+                "Desired URL Name": prop_str(props, "desired url name"),
+                "Published (Y/N)": prop_str(props, "published"),
+                "Featured (Y/N)": prop_str(props, "featured"),
+                ROW_HEADER: (hash_bytes(raw_bytes), header),
+            })
+    return out
+
+INDEX_LOADERS = {
+    "excel": lambda obs_root: load_index_excel(Path(EXCEL_PATH)),
+    "csv": lambda obs_root: load_index_csv(Path(CSV_PATH)),
+    "frontmatter": load_index_frontmatter,
+}
+
+def load_index(source: str, obs_root: Path) -> list[dict]:
+    if source not in INDEX_LOADERS:
+        raise ValueError(f"Unknown index source: {source} (expected one of {', '.join(INDEX_LOADERS)})")
+    return INDEX_LOADERS[source](obs_root)
+
+def iter_published(rows: list[dict], obs_root: Path):
+    """
+    Yields (row, file_name, folder_name, slug, featured, md_path) for every
+    published row whose Markdown file exists, in index order.
+    """
+    for row in rows:
+        if not yn_to_bool(row["Published (Y/N)"]):
+            continue
+
+        file_name = str(row["File Name"]).strip()
+        folder_name = str(row["Folder Name"]).strip()
+        desired_url = str(row["Desired URL Name"]).strip()
+        featured = yn_to_bool(row["Featured (Y/N)"])
+
+        if not desired_url:
+            desired_url = safe_slug(file_name)
+        slug = safe_slug(desired_url)
+
+        folder_path = obs_root / folder_name
+        md_path = find_markdown_file(folder_path, file_name)
+        if md_path is None:
+            print(f"[WARN] No markdown file found: Folder='{folder_name}', File='{file_name}'")
+            continue
+
+        yield row, file_name, folder_name, slug, featured, md_path
+
+# ==============================
+# Build manifest (incremental builds)
+# ==============================
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def hash_json(obj) -> str:
+    return hash_bytes(json.dumps(obj, sort_keys=True, default=str).encode("utf-8"))
+
+def hash_row(row: dict) -> str:
+    return hash_json([row[c] for c in INDEX_COLUMNS])
+
+def template_key() -> str:
+    # The stylesheet name is part of every page, so a CSS change is a template change too.
+    return f"{TEMPLATE_VERSION}/{blog_stylesheet_name()}"
+
+# The manifest is a sqlite database. Each build writes a fresh one next to
+# it (MANIFEST_NAME + ".tmp") with the previous build attached as "old", and
+# swaps it in at the end, so a failed build keeps the last good manifest.
+# Posts, their tags and search terms live only here: blog.json, the search
+# index, blog.html and the tag pages are streamed back out of it.
+MANIFEST_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE posts (
+    id INTEGER PRIMARY KEY,         -- index order, also the search doc id
+    slug TEXT NOT NULL,
+    entry TEXT NOT NULL,            -- JSON: what the page was rendered from
+    post TEXT NOT NULL,             -- JSON: Post.to_dict()
+    terms TEXT NOT NULL,            -- JSON: search_terms()
+    search_len INTEGER NOT NULL,
+    featured INTEGER NOT NULL,
+    date TEXT NOT NULL
+);
+CREATE INDEX posts_slug ON posts (slug);
+CREATE TABLE post_tags (tag TEXT NOT NULL, post_id INTEGER NOT NULL);
+CREATE INDEX post_tags_tag ON post_tags (tag);
+CREATE TABLE pages (key TEXT PRIMARY KEY, hash TEXT NOT NULL);
+CREATE TABLE images (key TEXT PRIMARY KEY, digest TEXT NOT NULL, info TEXT NOT NULL);
+CREATE INDEX images_digest ON images (digest);
+"""
+
+def clean_record(post: dict) -> dict:
+    # "generated_at" is ignored so re-rendering a post doesn't dirty its tag pages.
+    return {k: v for k, v in post.items() if k != "generated_at"}
+
+class BuildStore:
+    """
+    One build's manifest. Besides storing posts it keeps a running hash of
+    the inputs of every derived page (blog.json, blog.html, each tag page,
+    the search index) as posts are added, so deciding what to rewrite
+    needs no second pass.
+    """
+
+    def __init__(self, path: Path, force: bool = False):
+        self.path = path
+        self.tmp_path = path.with_name(path.name + ".tmp")
+        self.tmp_path.unlink(missing_ok=True)
+        self.db = sqlite3.connect(self.tmp_path)
+        self.db.executescript(MANIFEST_SCHEMA)
+        self.db.execute(f"PRAGMA user_version = {MANIFEST_FORMAT}")
+
+        # Image derivatives survive --force and template changes; posts and pages don't.
+        self.has_old = self.attach_old()
+        self.db.execute("INSERT INTO meta VALUES ('template_version', ?)", (template_key(),))
+        self.reuse = self.has_old and not force and self.old_template_ok()
+        self.old_pages = dict(self.db.execute("SELECT key, hash FROM old.pages")) if self.reuse else {}
+        self.pages = {}
+
+        self.n_posts = 0
+        self.n_featured = 0
+        self.hashes = {name: hashlib.sha256() for name in ("records", "posts", "featured", "search")}
+        self.tag_hashes = {}
+
+    def attach_old(self) -> bool:
+        if not self.path.exists():
+            return False
+        try:
+            self.db.execute("ATTACH DATABASE ? AS old", (str(self.path),))
+            if self.db.execute("PRAGMA old.user_version").fetchone()[0] == MANIFEST_FORMAT:
+                return True
+        except sqlite3.DatabaseError:
+            pass
+        print(f"[WARN] Unreadable build manifest, doing a full build: {self.path}")
+        try:
+            self.db.execute("DETACH DATABASE old")
+        except sqlite3.DatabaseError:
+            pass
+        return False
+
+    def old_template_ok(self) -> bool:
+        row = self.db.execute("SELECT value FROM old.meta WHERE key = 'template_version'").fetchone()
+        if row is None or row[0] != template_key():
+            print("[INFO] Template version changed, doing a full build.")
+            return False
+        return True
+
+    # -------- Posts --------
+
+    def old_post(self, slug: str) -> tuple[dict, dict, dict] | None:
+        """(entry, post record, terms) from the previous build."""
+        if not self.reuse:
+            return None
+        row = self.db.execute(
+            "SELECT entry, post, terms FROM old.posts WHERE slug = ? ORDER BY id DESC LIMIT 1", (slug,),
+        ).fetchone()
+        return None if row is None else tuple(json.loads(x) for x in row)
+
+    def add_post(self, slug: str, entry: dict, post: dict, terms: dict):
+        post_id = self.n_posts
+        self.n_posts += 1
+        terms_json = json.dumps(terms)
+        self.db.execute("INSERT INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (
+            post_id, slug, json.dumps(entry), json.dumps(post), terms_json,
+            sum(terms.values()), post["featured"], post["date"] or "",
+        ))
+        self.db.executemany("INSERT INTO post_tags VALUES (?, ?)", [(t, post_id) for t in post["tags_raw"]])
+
+        record = json.dumps(post, sort_keys=True).encode("utf-8")
+        clean = json.dumps(clean_record(post), sort_keys=True).encode("utf-8")
+        self.hashes["records"].update(record)
+        self.hashes["posts"].update(clean)
+        self.hashes["search"].update(clean + terms_json.encode("utf-8"))
+        if post["featured"]:
+            self.n_featured += 1
+            self.hashes["featured"].update(clean)
+        for t in post["tags_raw"]:
+            self.tag_hashes.setdefault(t, hashlib.sha256()).update(clean)
+
+    def dropped_slugs(self) -> list[str]:
+        """Slugs the last build published and this one didn't (unpublished or renamed)."""
+        if not self.has_old:
+            return []
+        return [slug for (slug,) in self.db.execute(
+            "SELECT DISTINCT slug FROM old.posts WHERE slug NOT IN (SELECT slug FROM main.posts)"
+        )]
+
+    def dropped_tag_slugs(self) -> list[str]:
+        """Tag page slugs the last build had and this one doesn't."""
+        if not self.has_old:
+            return []
+        current = {safe_tag_slug(t) for (t,) in self.db.execute("SELECT DISTINCT tag FROM main.post_tags")}
+        old = {safe_tag_slug(t) for (t,) in self.db.execute("SELECT DISTINCT tag FROM old.post_tags")}
+        return sorted(old - current)
+
+    def page_hash(self, name: str, *extra) -> str:
+        """Inputs hash of a derived page: the template plus the posts it is built from."""
+        h = self.tag_hashes[name[4:]] if name.startswith("tag:") else self.hashes[name]
+        return hash_json([template_key(), name, h.hexdigest(), *extra])
+
+    def records(self, where: str = "", params=()):
+        """Post records (dicts) in index order."""
+        for (text,) in self.db.execute(f"SELECT post FROM posts {where} ORDER BY id", params):
+            yield json.loads(text)
+
+    def posts(self):
+        return map(Post.from_dict, self.records())
+
+    def featured_or_all(self):
+        """Posts (in index order) of the featured rows, or of every row when none is featured."""
+        return map(Post.from_dict, self.records("WHERE featured" if self.n_featured else ""))
+
+    def tags(self) -> list[str]:
+        """Every tag, sorted by display name (group_by_tag order)."""
+        tags = [t for (t,) in self.db.execute("SELECT DISTINCT tag FROM post_tags")]
+        return sorted(tags, key=lambda t: (prettify_tag(t).lower(), t))
+
+    def tag_posts(self, tag: str):
+        """A tag's posts, newest first (ties in index order), like group_by_tag()."""
+        cur = self.db.execute(
+            "SELECT p.post FROM post_tags t JOIN posts p ON p.id = t.post_id "
+            "WHERE t.tag = ? ORDER BY p.date DESC, t.rowid", (tag,),
+        )
+        for (text,) in cur:
+            yield Post.from_dict(json.loads(text))
+
+    # -------- Image derivatives --------
+
+    def image(self, key: str, old: bool = False) -> dict | None:
+        if old and not self.has_old:
+            return None
+        row = self.db.execute(
+            f"SELECT info FROM {'old.' if old else ''}images WHERE key = ?", (key,),
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def image_with_hash(self, digest: str) -> dict | None:
+        """Any image, from this build or the last, whose source bytes hash to `digest`."""
+        for schema in ("main", "old") if self.has_old else ("main",):
+            for (text,) in self.db.execute(
+                f"SELECT info FROM {schema}.images WHERE digest = ?", (digest[:16],),
+            ):
+                info = json.loads(text)
+                if info["hash"] == digest:
+                    return info
+        return None
+
+    def add_image(self, key: str, info: dict):
+        self.db.execute("INSERT OR REPLACE INTO images VALUES (?, ?, ?)",
+                        (key, info["hash"][:16], json.dumps(info, sort_keys=True)))
+
+    def images_with_digest(self, digest16: str) -> list[dict]:
+        return [json.loads(text) for (text,) in
+                self.db.execute("SELECT info FROM images WHERE digest = ?", (digest16,))]
+
+    # -------- Finish --------
+
+    def commit(self):
+        """Swaps the new manifest in for the old one."""
+        self.db.executemany("INSERT INTO pages VALUES (?, ?)", self.pages.items())
+        self.db.commit()
+        if self.has_old:
+            self.db.execute("DETACH DATABASE old")
+        self.db.close()
+        os.replace(self.tmp_path, self.path)
+
+    def discard(self):
+        self.db.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+def page_is_current(old_pages: dict, key: str, out_path: Path, inputs_hash: str) -> bool:
+    return out_path.exists() and old_pages.get(key) == inputs_hash
+
+def write_page(out_path: Path, key: str, inputs_hash: str, store: BuildStore, write):
+    """
+    Writes a derived page (blog.json, blog.html, tag pages) only when its inputs changed.
+    `write(out_path)` produces the file.
+    """
+    store.pages[key] = inputs_hash
+    if page_is_current(store.old_pages, key, out_path, inputs_hash):
+        WRITE_COUNTS["current"] += 1
+        print(f"[SKIP] Unchanged: {out_path}")
+        return
+    if write(out_path):
+        print(f"[OK] Wrote: {out_path}")
+    else:
+        print(f"[SKIP] Identical: {out_path}")
+
 # ==============================
 # Obsidian Properties (frontmatter)
 # ==============================
 
+# One pass over the document header: a single match finds the frontmatter
+# block, one compiled token grammar walks its lines, then find_first_h1()
+# hops between "#" characters from the body offset.
+#
+#   ---                           <- FRONTMATTER_RE (opening fence)
+#   tags: [a, b]                  <- "key" token, inline list
+#   tags:                         <- "key" token with empty value opens a block list...
+#     - Artificial_Intelligence   <- "item" token
+#   date: 2025-11-30              <- "key" token, scalar
+#   ---                           <- FRONTMATTER_RE (closing fence); body starts after it
+#   # Title                       <- H1_LINE_RE
+
+FRONTMATTER_RE = re.compile(r"\s*---[ \t]*\r?\n(.*?)^---[ \t]*\r?$\n?", re.S | re.M)
+# Each match consumes exactly one frontmatter line, so finditer() walks the
+# block line by line without rescanning: "key: value", "- item", or other.
+PROPERTY_TOKEN_RE = re.compile(
+    r"[ \t]*(?:-(?P<item>[^\n]*)|(?P<key>[A-Za-z_][^:\n]*):(?P<value>[^\n]*)|[^\n]*)\n?"
+)
+H1_LINE_RE = re.compile(r"[ \t]*#[ \t]+(.+)")
+
+@dataclass
+class PostHeader:
+    props: dict          # lower-cased property name -> str, or list[str] for list properties
+    body_offset: int     # index in the document where the Markdown body starts
+    title: str | None    # text of the first "# H1" in the body, if any
+
+def unquote(value: str) -> str:
+    return value.strip().strip("'\"")
+
+def find_first_h1(md_text: str, pos: int = 0) -> str | None:
+    """
+    First "# Title" line at or after `pos` (which must be a line start).
+    Jumps between "#" characters with str.find instead of trying a
+    multiline regex at every position of the body.
+    """
+    while True:
+        i = md_text.find("#", pos)
+        if i == -1:
+            return None
+        nl = md_text.rfind("\n", pos, i)
+        line_start = nl + 1 if nl != -1 else pos
+        m = H1_LINE_RE.match(md_text, line_start)
+        if m:
+            return m.group(1).strip()
+        nl = md_text.find("\n", i)
+        if nl == -1:
+            return None
+        pos = nl + 1
+
+def parse_post_header(md_text: str) -> PostHeader:
+    """
+    Parses Obsidian properties (YAML-style frontmatter), finds the body offset
+    and the first H1 in a single walk over the header. Any key is accepted,
+    e.g. tags, date, tagline, author, image, draft. Keys are lower-cased.
+    """
+    props = {}
+    body_offset = 0
+
+    m = FRONTMATTER_RE.match(md_text)
+    if m:
+        body_offset = m.end()
+        list_key = None
+        for tok in PROPERTY_TOKEN_RE.finditer(md_text, m.start(1), m.end(1)):
+            key, value, item = tok.group("key", "value", "item")
+            if key is None:
+                if item is not None and list_key is not None:
+                    item = unquote(item)
+                    if item:
+                        props[list_key].append(item)
+                continue
+
+            key = " ".join(key.lower().split())
+            value = value.strip()
+            if value.startswith("[") and value.endswith("]"):
+                props[key] = [unquote(v) for v in value[1:-1].split(",") if v.strip()]
+                list_key = None
+            elif value:
+                props[key] = unquote(value)
+                list_key = None
+            else:
+                # Empty value: either a block list follows, or it's just empty.
+                props[key] = []
+                list_key = key
+
+        # Block-list keys that never got an item are plain empty values.
+        for key, value in props.items():
+            if value == []:
+                props[key] = ""
+
+    return PostHeader(props=props, body_offset=body_offset, title=find_first_h1(md_text, body_offset))
+
 def parse_obsidian_properties(md_text: str) -> dict:
     """
     Reads YAML frontmatter:
@@ -97,45 +873,22 @@ def parse_obsidian_properties(md_text: str) -> dict:
     tagline: This is my tagline...
     ---
     """
-    props = {}
-    m = re.match(r"^\s*---\s*\n(.*?)\n---\s*\n", md_text, flags=re.S)
-    if not m:
-        return props
-
-    fm = m.group(1)
-
-    # tags inline: tags: [a, b]
-    tags_inline = re.search(r"(?m)^\s*tags\s*:\s*\[(.*?)\]\s*$", fm)
-    if tags_inline:
-        raw = tags_inline.group(1)
-        tags = [t.strip().strip("'\"") for t in raw.split(",") if t.strip()]
-        props["tags"] = tags
-
-    # tags block
-    tags_block = re.search(r"(?ms)^\s*tags\s*:\s*\n((?:\s*-\s*.*\n)+)", fm)
-    if tags_block:
-        lines = tags_block.group(1).splitlines()
-        tags = []
-        for line in lines:
-            mm = re.match(r"^\s*-\s*(.+)\s*$", line)
-            if mm:
-                tags.append(mm.group(1).strip().strip("'\""))
-        props["tags"] = tags
-
-    # date:
-    date_m = re.search(r"(?m)^\s*date\s*:\s*(.+)\s*$", fm)
-    if date_m:
-        props["date"] = date_m.group(1).strip().strip("'\"")
-
-    # tagline:  (case-insensitive match for convenience)
-    tagl_m = re.search(r"(?mi)^\s*tagline\s*:\s*(.+)\s*$", fm)
-    if tagl_m:
-        props["tagline"] = tagl_m.group(1).strip().strip("'\"")
-
-    return props
+    return parse_post_header(md_text).props
+
+def prop_list(props: dict, key: str) -> list[str]:
+    value = props.get(key, [])
+    if isinstance(value, list):
+        return value
+    return [value] if value else []
+
+def prop_str(props: dict, key: str) -> str:
+    value = props.get(key, "")
+    if isinstance(value, list):
+        return ", ".join(value)
+    return value
 
 def strip_frontmatter(md_text: str) -> str:
-    return re.sub(r"^\s*---\s*\n.*?\n---\s*\n", "", md_text, flags=re.S)
+    return md_text[parse_post_header(md_text).body_offset:]
 
 def prettify_tag(tag: str) -> str:
     # Convert underscores to spaces (per your request)
@@ -148,12 +901,15 @@ def prettify_tag(tag: str) -> str:
 WIKILINK_IMAGE_RE = re.compile(r"!\[\[(.+?)\]\]")
 MARKDOWN_IMAGE_RE = re.compile(r"!\[([^\]]*)\]\(([^)]+)\)")
 
-def obsidian_md_to_web_md(markdown_text: str, folder_name: str) -> str:
+def obsidian_md_to_web_md(markdown_text: str, folder_name: str, image_base: str | None = None) -> str:
     """
     For post pages in blogs/generated/<slug>.html, images live at:
       ../blog_posts/Blog Posts/<folder_name>/<image_file>
+    `image_base` replaces "../blog_posts/Blog Posts/" (apps.py serves posts elsewhere).
     """
-    base_prefix = f"../blog_posts/Blog Posts/{folder_name}/"
+    if image_base is None:
+        image_base = POST_PAGE_IMAGE_PREFIX
+    base_prefix = f"{image_base}{folder_name}/"
 
     def repl_wikilink(m):
         target = m.group(1).strip()
@@ -171,8 +927,10 @@ def obsidian_md_to_web_md(markdown_text: str, folder_name: str) -> str:
 
         src_clean = src.strip("\"'")
 
-        if src_clean.startswith("../blog_posts/Blog Posts/"):
+        if src_clean.startswith(image_base):
             return f"![{alt}]({src_clean})"
+        if src_clean.startswith(POST_PAGE_IMAGE_PREFIX):
+            return f"![{alt}]({image_base}{src_clean[len(POST_PAGE_IMAGE_PREFIX):]})"
 
         return f"![{alt}]({base_prefix}{src_clean})"
 
@@ -211,23 +969,909 @@ def extract_first_image_src(raw_md: str, folder_name: str, from_where: str) -> s
 
     return None
 
-def markdown_to_html(markdown_text: str) -> str:
-    return md_lib.markdown(
-        markdown_text,
+# ==============================
+# Markdown backends
+# ==============================
+# Each backend factory imports its library and returns a text -> HTML function.
+# Factories run once per process (workers included), on first use.
+
+def toc_slug(text: str) -> str:
+    """Heading id, the way Python-Markdown's toc extension makes it."""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    text = re.sub(r"[^\w\s-]", "", text).strip().lower()
+    return re.sub(r"[-\s]+", "-", text)
+
+def python_markdown_backend():
+    import markdown as md_lib
+
+    md = md_lib.Markdown(
         extensions=["extra", "tables", "toc", "fenced_code", "sane_lists", "smarty"],
         output_format="html5",
     )
 
+    def render(markdown_text: str) -> str:
+        return md.reset().convert(markdown_text)
+    return render
+
+SPACED_IMAGE_DEST_RE = re.compile(r"!\[([^\]]*)\]\(([^()<>\n]*?\s[^()<>\n]*?)\)")
+
+def markdown_it_backend():
+    from markdown_it import MarkdownIt
+    from mdit_py_plugins.anchors import anchors_plugin
+    from mdit_py_plugins.deflist import deflist_plugin
+    from mdit_py_plugins.footnote import footnote_plugin
+
+    # CommonMark (fenced code built in) + the pieces of "extra"/toc/smarty the posts use
+    md = (
+        MarkdownIt("commonmark", {"html": True, "typographer": True})
+        .enable(["table", "strikethrough", "replacements", "smartquotes"])
+        .use(anchors_plugin, min_level=1, max_level=6, slug_func=toc_slug)
+        .use(deflist_plugin)
+        .use(footnote_plugin)
+    )
+
+    def render(markdown_text: str) -> str:
+        # CommonMark ends a link destination at the first space; vault paths
+        # ("Blog Posts/...") have them, so wrap those in <...>
+        return md.render(SPACED_IMAGE_DEST_RE.sub(r"![\1](<\2>)", markdown_text))
+    return render
+
+MARKDOWN_BACKENDS = {
+    "python-markdown": python_markdown_backend,
+    "markdown-it": markdown_it_backend,
+}
+
+@lru_cache(maxsize=None)
+def markdown_renderer(backend: str):
+    if backend not in MARKDOWN_BACKENDS:
+        raise ValueError(f"Unknown Markdown backend: {backend} (expected one of {', '.join(MARKDOWN_BACKENDS)})")
+    return MARKDOWN_BACKENDS[backend]()
+
+def markdown_to_html(markdown_text: str, backend: str | None = None) -> str:
+    return markdown_renderer(backend or MARKDOWN_BACKEND)(markdown_text)
+
+# ==============================
+# RESPONSIVE IMAGES (blogs/generated/img/)
+# ==============================
+# Every local image a post links is resized to IMAGE_WIDTHS in IMAGE_FORMATS.
+# Derivatives are named <source sha256[:16]>-<width>.<ext>, so an image that
+# hasn't changed is never re-encoded. The build manifest's images table (see
+# BuildStore) maps each source, by vault-relative path, to its (mtime, size),
+# hash, dimensions and derivative files; the last build's rows are read back
+# from "old.images".
+#
+# "info" dicts below look like:
+#   {"hash": ..., "width": 1920, "height": 1080,
+#    "variants": {"webp": [[480, "<hash>-480.webp"], ...], "jpeg": [...]}}
+
+POST_PAGE_IMAGE_PREFIX = "../blog_posts/Blog Posts/"
+IMAGE_EXTENSIONS = {"avif": "avif", "webp": "webp", "jpeg": "jpg"}
+IMG_TAG_RE = re.compile(r"<img\b[^>]*>")
+IMG_ATTR_RE = re.compile(r'\b(src|alt)="([^"]*)"')
+
+def local_image_refs(raw_md: str, folder_name: str) -> list[str]:
+    """
+    Post-page srcs ("../blog_posts/Blog Posts/<folder>/<file>") of every local
+    image in the post, in order, as obsidian_md_to_web_md will emit them.
+    """
+    base_prefix = f"{POST_PAGE_IMAGE_PREFIX}{folder_name}/"
+    refs = []
+    for m in WIKILINK_IMAGE_RE.finditer(raw_md):
+        refs.append(f"{base_prefix}{m.group(1).strip().split('|')[0].strip()}")
+    for m in MARKDOWN_IMAGE_RE.finditer(raw_md):
+        src = m.group(2).strip().strip("\"'")
+        if re.match(r"^https?://", src, flags=re.I):
+            continue
+        refs.append(src if src.startswith(POST_PAGE_IMAGE_PREFIX) else f"{base_prefix}{src}")
+    return list(dict.fromkeys(refs))
+
+def image_source_path(post_src: str, obs_root: Path) -> Path | None:
+    if not post_src.startswith(POST_PAGE_IMAGE_PREFIX):
+        return None
+    path = obs_root / unquote_url(post_src[len(POST_PAGE_IMAGE_PREFIX):])
+    return path if path.is_file() else None
+
+def image_refs_key(refs: list[str], obs_root: Path) -> str:
+    """
+    Cheap fingerprint of a post's images: (mtime, size) of each file.
+    Part of the manifest check, so replacing an image re-renders the post.
+    """
+    state = []
+    for ref in refs:
+        path = image_source_path(ref, obs_root)
+        if path is None:
+            state.append([ref, None])
+        else:
+            st = path.stat()
+            state.append([ref, st.st_mtime_ns, st.st_size])
+    return hash_json(state)
+
+@lru_cache(maxsize=None)
+def available_image_formats() -> tuple[str, ...] | None:
+    """
+    IMAGE_FORMATS this Pillow build can write, or None without Pillow.
+    """
+    try:
+        from PIL import features
+    except ImportError:
+        return None
+    checks = {"avif": "avif", "webp": "webp"}
+    formats = tuple(f for f in IMAGE_FORMATS if f not in checks or features.check(checks[f]))
+    return formats if "jpeg" in formats else formats + ("jpeg",)
+
+def derivative_widths(width: int) -> list[int]:
+    return sorted({min(w, width) for w in IMAGE_WIDTHS})
+
+def encode_image(task: dict) -> dict:
+    """
+    Resizes one source image into every width/format. Runs in a worker process.
+    """
+    from PIL import Image, ImageOps
+
+    out_dir = Path(task["out_dir"])
+    digest = task["hash"][:16]
+
+    with Image.open(task["src"]) as im:
+        im = ImageOps.exif_transpose(im)
+        if im.mode not in ("RGB", "RGBA"):
+            im = im.convert("RGBA" if "A" in im.getbands() or "transparency" in im.info else "RGB")
+        width, height = im.size
+
+        if im.mode == "RGBA":
+            flat = Image.new("RGB", im.size, (255, 255, 255))
+            flat.paste(im, mask=im.getchannel("A"))
+        else:
+            flat = im
+
+        variants = {fmt: [] for fmt in task["formats"]}
+        for w in derivative_widths(width):
+            h = max(1, round(height * w / width))
+            resized = im if w == width else im.resize((w, h), Image.LANCZOS)
+            if flat is im:
+                resized_flat = resized
+            else:
+                resized_flat = flat if w == width else flat.resize((w, h), Image.LANCZOS)
+            for fmt in task["formats"]:
+                name = f"{digest}-{w}.{IMAGE_EXTENSIONS[fmt]}"
+                frame = resized_flat if fmt == "jpeg" else resized
+                save_kwargs = {"quality": IMAGE_QUALITY[fmt]}
+                if fmt == "jpeg":
+                    save_kwargs.update(optimize=True, progressive=True)
+                frame.save(out_dir / name, format=fmt.upper(), **save_kwargs)
+                variants[fmt].append([w, name])
+
+    return {"hash": task["hash"], "width": width, "height": height, "variants": variants}
+
+def derivatives_exist(info: dict, img_dir: Path) -> bool:
+    return all((img_dir / name).exists() for items in info["variants"].values() for _, name in items)
+
+def build_image_derivatives(post_srcs: list[str], obs_root: Path, img_dir: Path,
+                            pool: "WorkerPool", store: BuildStore) -> dict:
+    """
+    Makes sure every referenced image has up-to-date derivatives and records
+    them in the manifest. Returns {post-page src: info}. Empty when Pillow
+    isn't installed.
+    """
+    formats = available_image_formats()
+    if formats is None:
+        return {}
+
+    img_dir.mkdir(parents=True, exist_ok=True)
+    found = {}
+    tasks = {}
+    src_to_key = {}
+    for post_src in post_srcs:
+        path = image_source_path(post_src, obs_root)
+        if path is None:
+            continue
+        key = path.relative_to(obs_root).as_posix()
+        src_to_key[post_src] = key
+        if key in found or key in tasks:
+            continue
+        done = store.image(key)       # already handled by an earlier batch
+        if done is not None:
+            found[key] = done
+            continue
+
+        st = path.stat()
+        cached = store.image(key, old=True)
+        if (
+            cached
+            and cached["mtime_ns"] == st.st_mtime_ns
+            and cached["size"] == st.st_size
+            and sorted(cached["variants"]) == sorted(formats)
+            and derivatives_exist(cached, img_dir)
+        ):
+            found[key] = cached
+            store.add_image(key, cached)
+            continue
+
+        data = path.read_bytes()
+        count_bytes("read", len(data))
+        digest = hash_bytes(data)
+        same_content = store.image_with_hash(digest)
+        if (
+            same_content
+            and sorted(same_content["variants"]) == sorted(formats)
+            and derivatives_exist(same_content, img_dir)
+        ):
+            found[key] = {**same_content, "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+            store.add_image(key, found[key])
+            continue
+
+        tasks[key] = {
+            "src": str(path),
+            "hash": digest,
+            "out_dir": str(img_dir),
+            "formats": list(formats),
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+        }
+
+    if tasks:
+        keys = list(tasks)
+        infos = pool.map(encode_image, [tasks[k] for k in keys])
+        for key, info in zip(keys, infos):
+            found[key] = {**info, "mtime_ns": tasks[key]["mtime_ns"], "size": tasks[key]["size"]}
+            store.add_image(key, found[key])
+            if TRACE is not None:
+                for items in info["variants"].values():
+                    for _, name in items:
+                        count_file("written", img_dir / name)
+            print(f"[OK] Encoded image: {key}")
+
+    return {post_src: found[key] for post_src, key in src_to_key.items()}
+
+def prune_image_derivatives(img_dir: Path, store: BuildStore):
+    """
+    Drops every file in img_dir that no row of this build's images table
+    names, including the images.json index older builds kept there.
+    """
+    if not img_dir.is_dir() or available_image_formats() is None:
+        return
+    for old in img_dir.iterdir():
+        digest16 = old.name.partition("-")[0]
+        if not any(
+            old.name == name
+            for info in store.images_with_digest(digest16)
+            for items in info["variants"].values()
+            for _, name in items
+        ):
+            old.unlink()
+
+def srcset(items: list, prefix: str) -> str:
+    return ", ".join(f"{prefix}{name} {w}w" for w, name in items)
+
+def responsive_picture_html(src: str, alt: str, info: dict | None, prefix: str, sizes: str) -> str:
+    """
+    <picture> with one <source> per modern format and a JPEG <img> fallback.
+    `prefix` is the path from the page to blogs/generated/img/.
+    Without derivatives, falls back to a plain <img> of the original.
+    """
+    if not info:
+        return f'<img src="{src}" alt="{alt}">'
+
+    sources = "".join(
+        f'<source type="image/{fmt}" srcset="{srcset(info["variants"][fmt], prefix)}" sizes="{sizes}">'
+        for fmt in IMAGE_FORMATS
+        if fmt != "jpeg" and fmt in info["variants"]
+    )
+    jpeg = info["variants"]["jpeg"]
+    fallback_w, fallback_name = jpeg[-1]
+    fallback_h = max(1, round(info["height"] * fallback_w / info["width"]))
+    return (
+        f"<picture>{sources}"
+        f'<img src="{prefix}{fallback_name}" srcset="{srcset(jpeg, prefix)}" sizes="{sizes}" '
+        f'width="{fallback_w}" height="{fallback_h}" alt="{alt}" loading="lazy" decoding="async">'
+        f"</picture>"
+    )
+
+def apply_responsive_images(body_html: str, images: dict, prefix: str, sizes: str) -> str:
+    """
+    Replaces <img> tags in rendered post HTML whose src has derivatives.
+    `images` is keyed by the raw post-page src; markdown-it percent-encodes
+    it ("Blog%20Posts/..."), so the decoded form is tried too.
+    """
+    if not images:
+        return body_html
+
+    def repl(m):
+        attrs = dict(IMG_ATTR_RE.findall(m.group(0)))
+        src = html_lib.unescape(attrs.get("src", ""))
+        info = images.get(src) or images.get(unquote_url(src))
+        if not info:
+            return m.group(0)
+        return responsive_picture_html(attrs["src"], attrs.get("alt", ""), info, prefix, sizes)
+
+    return IMG_TAG_RE.sub(repl, body_html)
+
+# ==============================
+# SHARED BLOG STYLESHEET (static/blog.<hash>.css)
+# ==============================
+# Styles for post, tag and index pages live in one fingerprinted file so
+# browsers cache it across pages. The name changes whenever the CSS does.
+
+def blog_stylesheet_css() -> str:
+    return f"""/* ---- Post pages (blogs/generated/<slug>.html) ---- */
+
+.blog-post-wrapper {{
+  max-width: 980px;
+  margin: 40px auto 90px;
+  padding: 0 40px;
+}}
+
+.post-hero {{
+  background: {HEADER_GRAY};
+  width: 100%;
+  padding: 0;
+  margin-top: 120px;
+}}
+
+.post-hero-inner {{
+  max-width: 980px;
+  margin: 0 auto;
+  padding: 48px 48px 36px;
+}}
+
+.post-tags {{
+  color: {ACCENT_RED};
+  font-weight: 700;
+  letter-spacing: 1px;
+  text-transform: uppercase;
+  font-size: 18px;
+  margin-bottom: 18px;
+}}
+
+.post-title {{
+  margin: 0 0 18px;
+  font-size: 64px;
+  line-height: 1.05;
+  font-weight: 700;
+  color: #000;
+}}
+
+.post-date {{
+  font-size: 18px;
+  margin-bottom: 18px;
+  color: #000;
+}}
+
+.post-author {{
+  font-size: 20px;
+  font-weight: 700;
+  color: {ACCENT_RED};
+}}
+
+.author-link {{
+  color: {ACCENT_RED};
+  text-decoration: none;
+  font-weight: 700;
+}}
+.author-link:hover {{
+  text-decoration: underline;
+}}
+
+.post-body {{
+  margin-top: 38px;
+}}
+
+.post-body p {{
+  font-size: 18px;
+  line-height: 1.85;
+  margin: 16px 0;
+}}
+
+.post-body img {{
+  max-width: 100%;
+  height: auto;
+  border: 2px solid #000;
+  background: #e0e0e0;
+  margin: 22px 0;
+  display: block;
+}}
+
+.post-disclaimer {{
+  margin-top: 48px;
+  padding-top: 18px;
+  border-top: 1px solid #000;
+  font-size: 16px;
+  line-height: 1.7;
+  color: #000;
+}}
+
+.back-link {{
+  display: inline-block;
+  margin-top: 36px;
+  font-weight: 700;
+  text-decoration: none;
+  color: {ACCENT_RED};
+}}
+.back-link:hover {{
+  text-decoration: underline;
+}}
+
+/* ---- Blog index (blog.html) ---- */
+
+.blog-hero {{
+  margin-top: 120px; /* below fixed navbar */
+  background: #000;
+  color: #fff;
+  padding: 70px 80px;
+}}
+.blog-hero h1 {{
+  margin: 0;
+  font-size: 72px;
+  font-weight: 700;
+  letter-spacing: 0.5px;
+}}
+
+.blog-divider {{
+  height: 1px;
+  background: #000;
+  margin: 0;
+}}
+
+.blog-cats {{
+  background: {HEADER_GRAY};
+  padding: 18px 80px 26px;
+}}
+.blog-cats-title {{
+  font-weight: 700;
+  margin: 10px 0 14px;
+  font-size: 18px;
+  color: #000;
+}}
+.cat-row {{
+  display: flex;
+  flex-wrap: wrap;
+  gap: 14px;
+}}
+.cat-chip {{
+  display: inline-block;
+  padding: 10px 14px;
+  border: 1px solid #000;
+  background: #fff;
+  color: #000;
+  text-decoration: none;
+  font-weight: 700;
+  border-radius: 999px;
+  transition: transform 0.15s ease, color 0.15s ease, border-color 0.15s ease;
+}}
+.cat-chip:hover {{
+  color: {ACCENT_RED};
+  border-color: {ACCENT_RED};
+  transform: translateY(-1px);
+}}
+
+.blog-search {{
+  max-width: 1200px;
+  margin: 30px auto 0;
+  padding: 0 40px;
+  display: flex;
+  flex-wrap: wrap;
+  gap: 12px;
+}}
+.blog-search[hidden] {{
+  display: none;
+}}
+.blog-search-input {{
+  flex: 1 1 320px;
+  padding: 10px 14px;
+  border: 1px solid #000;
+  font: inherit;
+}}
+.blog-search-input:focus {{
+  outline: none;
+  border-color: {ACCENT_RED};
+}}
+.blog-search select {{
+  padding: 10px 12px;
+  border: 1px solid #000;
+  background: #fff;
+  font: inherit;
+}}
+.blog-search-results {{
+  flex-basis: 100%;
+  list-style: none;
+  margin: 6px 0 0;
+  padding: 0;
+}}
+.blog-search-results li {{
+  padding: 12px 0;
+  border-bottom: 1px solid #e0e0e0;
+}}
+.blog-search-results a {{
+  color: #000;
+  font-weight: 700;
+  text-decoration: none;
+}}
+.blog-search-results a:hover {{
+  color: {ACCENT_RED};
+}}
+.blog-search-meta {{
+  font-size: 13px;
+  color: #333;
+  margin-top: 4px;
+}}
+
+.featured-wrap {{
+  max-width: 1200px;
+  margin: 40px auto 90px;
+  padding: 0 40px;
+}}
+
+.featured-title {{
+  font-size: 30px;
+  font-weight: 700;
+  margin: 10px 0 22px;
+}}
+
+/* Featured cards: clean, editorial */
+.featured-grid {{
+  display: grid;
+  grid-template-columns: repeat(2, minmax(0, 1fr));
+  gap: 28px;
+}}
+
+.feat-card {{
+  border: 1px solid #e0e0e0;
+  background: #fff;
+}}
+
+.feat-link {{
+  display: grid;
+  grid-template-columns: 240px 1fr;
+  gap: 0;
+  text-decoration: none;
+  color: #000;
+  min-height: 170px;
+}}
+
+.feat-img {{
+  background: #e0e0e0;
+  border-right: 1px solid #e0e0e0;
+  display: flex;
+  align-items: center;
+  justify-content: center;
+}}
+.feat-img picture {{
+  display: block;
+  width: 100%;
+  height: 100%;
+}}
+.feat-img img {{
+  width: 100%;
+  height: 100%;
+  object-fit: cover;
+  display: block;
+}}
+
+.feat-body {{
+  padding: 18px 18px 16px;
+}}
+
+.card-tag {{
+  font-size: 13px;
+  font-weight: 700;
+  color: {ACCENT_RED};
+  text-transform: uppercase;
+  letter-spacing: 0.8px;
+  margin-bottom: 8px;
+}}
+
+.feat-title {{
+  margin: 0 0 10px;
+  font-size: 22px;
+  font-weight: 700;
+  line-height: 1.25;
+}}
+
+.feat-date {{
+  font-size: 13px;
+  color: #333;
+  margin-bottom: 10px;
+}}
+
+.feat-tagline {{
+  font-size: 14px;
+  color: #000;
+  line-height: 1.5;
+}}
+
+.feat-link:hover .feat-title {{
+  color: {ACCENT_RED};
+}}
+
+@media (max-width: 900px) {{
+  .featured-grid {{
+    grid-template-columns: 1fr;
+  }}
+  .feat-link {{
+    grid-template-columns: 1fr;
+  }}
+  .feat-img {{
+    border-right: none;
+    border-bottom: 1px solid #e0e0e0;
+    height: 240px;
+  }}
+  .blog-hero {{
+    padding: 60px 24px;
+  }}
+  .blog-cats {{
+    padding: 18px 24px 26px;
+  }}
+  .blog-search {{
+    padding: 0 24px;
+  }}
+}}
+
+/* ---- Tag pages (blogs/tags/<tag>.html) ---- */
+
+.tag-page-wrap {{
+  max-width: 980px;
+  margin: 160px auto 90px;
+  padding: 0 40px;
+}}
+
+.tag-page-title {{
+  font-size: 34px;
+  font-weight: 700;
+  margin: 0 0 18px;
+}}
+
+.tag-item {{
+  padding: 22px 0;
+}}
+
+.tag-item-link {{
+  display: grid;
+  grid-template-columns: 320px 1fr;
+  gap: 22px;
+  text-decoration: none;
+  color: #000;
+  align-items: start;
+}}
+
+.tag-item-img {{
+  background: #e0e0e0;
+  border: 1px solid #e0e0e0;
+  height: 200px;
+  overflow: hidden;
+  display: flex;
+  align-items: center;
+  justify-content: center;
+}}
+.tag-item-img picture {{
+  display: block;
+  width: 100%;
+  height: 100%;
+}}
+.tag-item-img img {{
+  width: 100%;
+  height: 100%;
+  object-fit: cover;
+  display: block;
+}}
+
+.tag-item-tag {{
+  font-size: 12px;
+  font-weight: 700;
+  color: {ACCENT_RED};
+  text-transform: uppercase;
+  letter-spacing: 0.9px;
+  margin-bottom: 8px;
+}}
+
+.tag-item-title {{
+  font-size: 22px;
+  font-weight: 700;
+  line-height: 1.3;
+  margin-bottom: 10px;
+}}
+
+.tag-item-date {{
+  font-size: 13px;
+  color: #333;
+  margin-bottom: 10px;
+}}
+
+.tag-item-tagline {{
+  font-size: 14px;
+  color: #000;
+  line-height: 1.55;
+}}
+
+.tag-item-link:hover .tag-item-title {{
+  color: {ACCENT_RED};
+}}
+
+.tag-divider {{
+  height: 1px;
+  background: #000;
+  opacity: 0.18;
+  margin: 0;
+}}
+
+@media (max-width: 900px) {{
+  .tag-item-link {{
+    grid-template-columns: 1fr;
+  }}
+  .tag-item-img {{
+    height: 240px;
+  }}
+}}
+
+/* ---- Pagination (blog/page/<n>.html, blogs/tags/<tag>/page/<n>.html) ---- */
+
+.pager {{
+  display: flex;
+  justify-content: space-between;
+  align-items: center;
+  gap: 18px;
+  margin: 34px 0 0;
+  font-size: 14px;
+  font-weight: 700;
+}}
+.pager a {{
+  color: #000;
+  text-decoration: none;
+}}
+.pager a:hover {{
+  color: {ACCENT_RED};
+}}
+.pager-page {{
+  color: #333;
+  font-weight: 400;
+}}
+"""
+
+@lru_cache(maxsize=None)
+def blog_stylesheet_name() -> str:
+    digest = hash_bytes(blog_stylesheet_css().encode("utf-8"))[:BLOG_CSS_HASH_LEN]
+    return f"blog.{digest}.css"
+
+def write_blog_stylesheet(static_dir: Path) -> Path:
+    """
+    Writes static/blog.<hash>.css if it doesn't exist yet and removes
+    stylesheets left over from older builds.
+    """
+    name = blog_stylesheet_name()
+    out_path = static_dir / name
+    if out_path.exists():
+        print(f"[SKIP] Unchanged: {out_path}")
+    else:
+        write_text(out_path, blog_stylesheet_css())
+        print(f"[OK] Wrote: {out_path}")
+
+    for old in static_dir.glob("blog.*.css"):
+        if old.name != name and BLOG_CSS_NAME_RE.fullmatch(old.name):
+            old.unlink()
+            print(f"[OK] Removed old stylesheet: {old}")
+    return out_path
+
+# ==============================
+# POST MODEL
+# ==============================
+# One record per published post, built once from the parsed source and
+# written out two ways: blog.json (the full record) and static/blog_posts.json
+# (the preview schema blog.js reads).
+
+FIRST_PARAGRAPH_RE = re.compile(r"<p>(.*?)</p>", flags=re.S)
+
+@dataclass(slots=True)
+class Post:
+    title: str
+    slug: str
+    folder: str
+    source_md: str
+    featured: bool
+    tags_raw: list
+    tags_pretty: list
+    date: str
+    tagline: str
+    synopsis: str
+    # Links:
+    url_site_root: str                  # from blog.html (site root)
+    url_from_tag_page: str              # from blogs/tags/*.html
+    # Images:
+    hero_image: str | None              # for blog.html at site root
+    hero_image_tag_page: str | None     # for tag pages
+    hero_image_info: dict | None        # resized derivatives, if any
+    generated_at: str = ""
+
+    def to_dict(self) -> dict:
+        """blog.json / build manifest record."""
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Post":
+        return cls(**d)
+
+    def to_preview(self) -> dict:
+        """static/blog_posts.json record (read by blog.js)."""
+        return {
+            "title": self.title,
+            "date": self.date,
+            "author": AUTHOR_NAME,
+            "synopsis": self.synopsis,
+            "image": self.hero_image or "",
+            "link": self.url_site_root,
+            "tags": self.tags_raw,
+        }
+
+def source_date_epoch() -> int | None:
+    """SOURCE_DATE_EPOCH (reproducible-builds.org), if set."""
+    value = os.environ.get("SOURCE_DATE_EPOCH", "").strip()
+    if not value:
+        return None
+    if not value.isdigit():
+        raise SystemExit(f"SOURCE_DATE_EPOCH must be a Unix timestamp, got {value!r}")
+    return int(value)
+
+def post_timestamp(md_path: Path, epoch: int | None) -> str:
+    """
+    generated_at: SOURCE_DATE_EPOCH when set, else the source file's mtime,
+    so the same sources always give the same blog.json.
+    """
+    ts = epoch if epoch is not None else int(md_path.stat().st_mtime)
+    return datetime.datetime.fromtimestamp(ts, datetime.timezone.utc).isoformat(timespec="seconds")
+
+def make_synopsis(tagline: str, body_html: str) -> str:
+    """The tagline, else the first paragraph as plain text, cut at a word boundary."""
+    if tagline:
+        return tagline
+    m = FIRST_PARAGRAPH_RE.search(body_html)
+    if not m:
+        return ""
+    text = " ".join(html_lib.unescape(HTML_TAG_RE.sub(" ", m.group(1))).split())
+    if len(text) <= SYNOPSIS_MAX_CHARS:
+        return text
+    return text[:SYNOPSIS_MAX_CHARS].rsplit(" ", 1)[0] + "…"
+
+# ==============================
+# TEMPLATES
+# ==============================
+# Page chrome (head, stylesheet links, navbar, footer) is rendered once per build
+# into a PageTemplate; only the @@slot@@ markers are filled in per page.
+# A slot value is a str, or an iterable of str that is streamed chunk by chunk.
+
+SLOT_RE = re.compile(r"@@(\w+)@@")
+
+class PageTemplate:
+    __slots__ = ("parts",)
+
+    def __init__(self, source: str):
+        # Even indexes: literal text. Odd indexes: slot names.
+        self.parts = tuple(SLOT_RE.split(source))
+
+    def chunks(self, slots: dict):
+        parts = self.parts
+        for i in range(0, len(parts) - 1, 2):
+            yield parts[i]
+            value = slots[parts[i + 1]]
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+        yield parts[-1]
+
+    def render(self, **slots) -> str:
+        return "".join(self.chunks(slots))
+
+def write_template(path: Path, template: PageTemplate, **slots) -> bool:
+    return write_chunks(path, template.chunks(slots))
+
 # ==============================
 # POST PAGE TEMPLATE
 # ==============================
 
-def make_post_header_block(tags: list[str], title: str, date_str: str | None) -> str:
+def make_post_header_block(tags: list[str], title: str, date_str: str | None,
+                           root: str = REL_TO_SITE_ROOT_FROM_POST + "/") -> str:
     tags_html = "; ".join(prettify_tag(t) for t in tags) if tags else ""
     date_html = f'<div class="post-date">{date_str}</div>' if date_str else ""
 
     author_html = (
-        f'By <a class="author-link" href="{REL_TO_SITE_ROOT_FROM_POST}/about.html">{AUTHOR_NAME}</a>'
+        f'By <a class="author-link" href="{root}about.html">{AUTHOR_NAME}</a>'
     )
 
     return f"""
@@ -241,148 +1885,52 @@ def make_post_header_block(tags: list[str], title: str, date_str: str | None) ->
 </section>
 """
 
-def wrap_post_page(title: str, header_block_html: str, body_html: str) -> str:
-    return f"""<!DOCTYPE html>
+@lru_cache(maxsize=None)
+def post_page_template() -> PageTemplate:
+    return PageTemplate(f"""<!DOCTYPE html>
 <html lang="en">
 <head>
   <meta charset="UTF-8">
-  <title>{title} | Anand Lal</title>
+  <title>@@title@@ | Anand Lal</title>
   <meta name="viewport" content="width=device-width, initial-scale=1.0">
 
   <link rel="preconnect" href="https://fonts.googleapis.com">
   <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
   <link href="https://fonts.googleapis.com/css2?family=Lato:wght@400;700&display=swap" rel="stylesheet">
 
-  <link rel="stylesheet" href="{REL_TO_SITE_ROOT_FROM_POST}/static/style.css">
-
-  <style>
-    .blog-post-wrapper {{
-      max-width: 980px;
-      margin: 40px auto 90px;
-      padding: 0 40px;
-    }}
-
-    .post-hero {{
-      background: {HEADER_GRAY};
-      width: 100%;
-      padding: 0;
-      margin-top: 120px;
-    }}
-
-    .post-hero-inner {{
-      max-width: 980px;
-      margin: 0 auto;
-      padding: 48px 48px 36px;
-    }}
-
-    .post-tags {{
-      color: {ACCENT_RED};
-      font-weight: 700;
-      letter-spacing: 1px;
-      text-transform: uppercase;
-      font-size: 18px;
-      margin-bottom: 18px;
-    }}
-
-    .post-title {{
-      margin: 0 0 18px;
-      font-size: 64px;
-      line-height: 1.05;
-      font-weight: 700;
-      color: #000;
-    }}
-
-    .post-date {{
-      font-size: 18px;
-      margin-bottom: 18px;
-      color: #000;
-    }}
-
-    .post-author {{
-      font-size: 20px;
-      font-weight: 700;
-      color: {ACCENT_RED};
-    }}
-
-    .author-link {{
-      color: {ACCENT_RED};
-      text-decoration: none;
-      font-weight: 700;
-    }}
-    .author-link:hover {{
-      text-decoration: underline;
-    }}
-
-    .post-body {{
-      margin-top: 38px;
-    }}
-
-    .post-body p {{
-      font-size: 18px;
-      line-height: 1.85;
-      margin: 16px 0;
-    }}
-
-    .post-body img {{
-      max-width: 100%;
-      height: auto;
-      border: 2px solid #000;
-      background: #e0e0e0;
-      margin: 22px 0;
-      display: block;
-    }}
-
-    .post-disclaimer {{
-      margin-top: 48px;
-      padding-top: 18px;
-      border-top: 1px solid #000;
-      font-size: 16px;
-      line-height: 1.7;
-      color: #000;
-    }}
-
-    .back-link {{
-      display: inline-block;
-      margin-top: 36px;
-      font-weight: 700;
-      text-decoration: none;
-      color: {ACCENT_RED};
-    }}
-    .back-link:hover {{
-      text-decoration: underline;
-    }}
-  </style>
+  <link rel="stylesheet" href="@@root@@static/style.css">
+  <link rel="stylesheet" href="@@root@@static/{blog_stylesheet_name()}">
 </head>
 
 <body>
 
 <header class="navbar">
   <div class="navbar-left">
-    <a href="{REL_TO_SITE_ROOT_FROM_POST}/index.html" class="logo">
-      <img src="{REL_TO_SITE_ROOT_FROM_POST}/Attachments/logo.jpg" alt="Anand Lal Logo">
+    <a href="@@root@@index.html" class="logo">
+      <img src="@@root@@Attachments/logo.jpg" alt="Anand Lal Logo">
     </a>
   </div>
 
   <nav class="navbar-right">
-    <a href="{REL_TO_SITE_ROOT_FROM_POST}/index.html">Home</a>
-    <a href="{REL_TO_SITE_ROOT_FROM_POST}/about.html">About Me</a>
-    <a href="{REL_TO_SITE_ROOT_FROM_POST}/poetry.html">Poetry</a>
-    <a href="{REL_TO_SITE_ROOT_FROM_POST}/photos.html">Photos</a>
-    <a href="{REL_TO_SITE_ROOT_FROM_POST}/blog.html" class="active">Blog</a>
+    <a href="@@root@@index.html">Home</a>
+    <a href="@@root@@about.html">About Me</a>
+    <a href="@@root@@poetry.html">Poetry</a>
+    <a href="@@root@@photos.html">Photos</a>
+    <a href="@@root@@blog.html" class="active">Blog</a>
   </nav>
 </header>
 
 <main>
-  {header_block_html}
+  @@header_block@@
 
   <div class="blog-post-wrapper">
     <div class="post-body">
-      {body_html}
+      @@body@@
 
       <div class="post-disclaimer">{DISCLAIMER_TEXT}</div>
     </div>
 
-    <a class="back-link" href="{REL_TO_SITE_ROOT_FROM_POST}/blog.html">← Back to Blog</a>
+    <a class="back-link" href="@@root@@blog.html">← Back to Blog</a>
   </div>
 </main>
 
@@ -392,46 +1940,84 @@ def wrap_post_page(title: str, header_block_html: str, body_html: str) -> str:
 
 </body>
 </html>
-"""
+""")
+
+def wrap_post_page(title: str, header_block_html: str, body_html: str,
+                   root: str = REL_TO_SITE_ROOT_FROM_POST + "/") -> str:
+    return post_page_template().render(
+        title=title, header_block=header_block_html, body=body_html, root=root,
+    )
 
 # ==============================
 # BLOG INDEX PAGE (site root blog.html)
 # ==============================
 
-def wrap_blog_index_page(featured_posts: list[dict], all_tags: list[str]) -> str:
-    # Categories chips
-    cat_html = "".join(
-        f'<a class="cat-chip" href="blogs/tags/{safe_tag_slug(t)}.html">{prettify_tag(t)}</a>'
-        for t in all_tags
-    )
+def rebase(url: str, prefix: str) -> str:
+    """`url` (relative to page 1) as seen from a page `prefix` deeper; absolute urls are kept."""
+    if not prefix or not url or url.startswith("/") or re.match(r"^[a-z][a-z0-9+.-]*:", url, flags=re.I):
+        return url
+    return prefix + url
 
-    # Featured grid (image + title + date)
-    cards = []
-    for p in featured_posts:
-        img = p.get("hero_image") or ""
-        img_html = f'<img src="{img}" alt="{p["title"]}">' if img else ""
-        tags = p.get("tags_pretty", [])
-        tagline = p.get("tagline") or ""
+def blog_index_cards(featured_posts: list[Post], prefix: str = ""):
+    """
+    Yields the featured cards for blog.html, "\n"-separated.
+    """
+    for i, p in enumerate(featured_posts):
+        img = rebase(p.hero_image or "", prefix)
+        img_html = responsive_picture_html(
+            img, p.title, p.hero_image_info, f"{prefix}blogs/generated/{IMAGE_SUBDIR}/", CARD_IMAGE_SIZES,
+        ) if img else ""
+        tags = p.tags_pretty
+        tagline = p.tagline or ""
         tag_label = prettify_tag(tags[0]) if tags else ""
         tag_label_html = f'<div class="card-tag">{tag_label}</div>' if tag_label else ""
 
-        cards.append(f"""
+        if i:
+            yield "\n"
+        yield f"""
         <article class="feat-card">
-          <a class="feat-link" href="{p["url_site_root"]}">
+          <a class="feat-link" href="{rebase(p.url_site_root, prefix)}">
             <div class="feat-img">{img_html}</div>
             <div class="feat-body">
               {tag_label_html}
-              <h2 class="feat-title">{p["title"]}</h2>
-              <div class="feat-date">{p.get("date","")}</div>
+              <h2 class="feat-title">{p.title}</h2>
+              <div class="feat-date">{p.date}</div>
               <div class="feat-tagline">{tagline}</div>
             </div>
           </a>
         </article>
-        """)
-
-    cards_html = "\n".join(cards)
+        """
+
+def blog_search_html(root: str) -> str:
+    """The search box; blog-search.js fills it from the static search index."""
+    return f"""<section class="blog-search" data-index="{root}blogs/generated/{SEARCH_SUBDIR}/{SEARCH_INDEX_NAME}" data-root="{root}" hidden>
+  <input type="search" class="blog-search-input" placeholder="Search posts" aria-label="Search posts">
+  <select class="blog-search-tag" aria-label="Category"><option value="">All categories</option></select>
+  <select class="blog-search-year" aria-label="Year"><option value="">All years</option></select>
+  <ol class="blog-search-results" hidden></ol>
+</section>
+<script src="{root}static/blog-search.js" defer></script>"""
 
-    return f"""<!DOCTYPE html>
+def blog_index_slots(featured_posts: list[Post], all_tags: list[str], root: str = "",
+                     tag_href: str = "blogs/tags/{slug}.html", prefix: str = "",
+                     search: bool = True) -> dict:
+    # Categories chips
+    cat_html = "".join(
+        f'<a class="cat-chip" href="{rebase(tag_href.format(slug=safe_tag_slug(t)), prefix)}">{prettify_tag(t)}</a>'
+        for t in all_tags
+    )
+    return {
+        "root": root,
+        "categories": cat_html,
+        "search": blog_search_html(root) if search else "",
+        "cards": blog_index_cards(featured_posts, prefix),
+        "page_links": "",
+        "pager": "",
+    }
+
+@lru_cache(maxsize=None)
+def blog_index_template() -> PageTemplate:
+    return PageTemplate(f"""<!DOCTYPE html>
 <html lang="en">
 <head>
   <meta charset="UTF-8">
@@ -442,180 +2028,25 @@ def wrap_blog_index_page(featured_posts: list[dict], all_tags: list[str]) -> str
   <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
   <link href="https://fonts.googleapis.com/css2?family=Lato:wght@400;700&display=swap" rel="stylesheet">
 
-  <link rel="stylesheet" href="static/style.css">
-
-  <style>
-    .blog-hero {{
-      margin-top: 120px; /* below fixed navbar */
-      background: #000;
-      color: #fff;
-      padding: 70px 80px;
-    }}
-    .blog-hero h1 {{
-      margin: 0;
-      font-size: 72px;
-      font-weight: 700;
-      letter-spacing: 0.5px;
-    }}
-
-    .blog-divider {{
-      height: 1px;
-      background: #000;
-      margin: 0;
-    }}
-
-    .blog-cats {{
-      background: {HEADER_GRAY};
-      padding: 18px 80px 26px;
-    }}
-    .blog-cats-title {{
-      font-weight: 700;
-      margin: 10px 0 14px;
-      font-size: 18px;
-      color: #000;
-    }}
-    .cat-row {{
-      display: flex;
-      flex-wrap: wrap;
-      gap: 14px;
-    }}
-    .cat-chip {{
-      display: inline-block;
-      padding: 10px 14px;
-      border: 1px solid #000;
-      background: #fff;
-      color: #000;
-      text-decoration: none;
-      font-weight: 700;
-      border-radius: 999px;
-      transition: transform 0.15s ease, color 0.15s ease, border-color 0.15s ease;
-    }}
-    .cat-chip:hover {{
-      color: {ACCENT_RED};
-      border-color: {ACCENT_RED};
-      transform: translateY(-1px);
-    }}
-
-    .featured-wrap {{
-      max-width: 1200px;
-      margin: 40px auto 90px;
-      padding: 0 40px;
-    }}
-
-    .featured-title {{
-      font-size: 30px;
-      font-weight: 700;
-      margin: 10px 0 22px;
-    }}
-
-    /* Featured cards: clean, editorial */
-    .featured-grid {{
-      display: grid;
-      grid-template-columns: repeat(2, minmax(0, 1fr));
-      gap: 28px;
-    }}
-
-    .feat-card {{
-      border: 1px solid #e0e0e0;
-      background: #fff;
-    }}
-
-    .feat-link {{
-      display: grid;
-      grid-template-columns: 240px 1fr;
-      gap: 0;
-      text-decoration: none;
-      color: #000;
-      min-height: 170px;
-    }}
-
-    .feat-img {{
-      background: #e0e0e0;
-      border-right: 1px solid #e0e0e0;
-      display: flex;
-      align-items: center;
-      justify-content: center;
-    }}
-    .feat-img img {{
-      width: 100%;
-      height: 100%;
-      object-fit: cover;
-      display: block;
-    }}
-
-    .feat-body {{
-      padding: 18px 18px 16px;
-    }}
-
-    .card-tag {{
-      font-size: 13px;
-      font-weight: 700;
-      color: {ACCENT_RED};
-      text-transform: uppercase;
-      letter-spacing: 0.8px;
-      margin-bottom: 8px;
-    }}
-
-    .feat-title {{
-      margin: 0 0 10px;
-      font-size: 22px;
-      font-weight: 700;
-      line-height: 1.25;
-    }}
-
-    .feat-date {{
-      font-size: 13px;
-      color: #333;
-      margin-bottom: 10px;
-    }}
-
-    .feat-tagline {{
-      font-size: 14px;
-      color: #000;
-      line-height: 1.5;
-    }}
-
-    .feat-link:hover .feat-title {{
-      color: {ACCENT_RED};
-    }}
-
-    @media (max-width: 900px) {{
-      .featured-grid {{
-        grid-template-columns: 1fr;
-      }}
-      .feat-link {{
-        grid-template-columns: 1fr;
-      }}
-      .feat-img {{
-        border-right: none;
-        border-bottom: 1px solid #e0e0e0;
-        height: 240px;
-      }}
-      .blog-hero {{
-        padding: 60px 24px;
-      }}
-      .blog-cats {{
-        padding: 18px 24px 26px;
-      }}
-    }}
-  </style>
+  <link rel="stylesheet" href="@@root@@static/style.css">
+  <link rel="stylesheet" href="@@root@@static/{blog_stylesheet_name()}">@@page_links@@
 </head>
 
 <body>
 
 <header class="navbar">
   <div class="navbar-left">
-    <a href="index.html" class="logo">
-      <img src="Attachments/logo.jpg" alt="Anand Lal Logo">
+    <a href="@@root@@index.html" class="logo">
+      <img src="@@root@@Attachments/logo.jpg" alt="Anand Lal Logo">
     </a>
   </div>
 
   <nav class="navbar-right">
-    <a href="index.html">Home</a>
-    <a href="about.html">About Me</a>
-    <a href="poetry.html">Poetry</a>
-    <a href="photos.html">Photos</a>
-    <a href="blog.html" class="active">Blog</a>
+    <a href="@@root@@index.html">Home</a>
+    <a href="@@root@@about.html">About Me</a>
+    <a href="@@root@@poetry.html">Poetry</a>
+    <a href="@@root@@photos.html">Photos</a>
+    <a href="@@root@@blog.html" class="active">Blog</a>
   </nav>
 </header>
 
@@ -628,15 +2059,18 @@ def wrap_blog_index_page(featured_posts: list[dict], all_tags: list[str]) -> str
 <section class="blog-cats">
   <div class="blog-cats-title">Categories</div>
   <div class="cat-row">
-    {cat_html}
+    @@categories@@
   </div>
 </section>
 
+@@search@@
+
 <div class="featured-wrap">
   <div class="featured-title">Featured Articles</div>
   <div class="featured-grid">
-    {cards_html}
+    @@cards@@
   </div>
+  @@pager@@
 </div>
 
 <footer class="site-footer">
@@ -645,162 +2079,91 @@ def wrap_blog_index_page(featured_posts: list[dict], all_tags: list[str]) -> str
 
 </body>
 </html>
-"""
+""")
+
+def wrap_blog_index_page(featured_posts: list[Post], all_tags: list[str]) -> str:
+    return blog_index_template().render(**blog_index_slots(featured_posts, all_tags))
 
 # ==============================
 # TAG PAGES (blogs/tags/<tag>.html)
 # ==============================
 
-def wrap_tag_page(tag: str, posts: list[dict]) -> str:
+def tag_page_items(tag: str, posts: list[Post], prefix: str = ""):
+    """
+    Yields the post list for a tag page, "\n"-separated.
+    """
     tag_pretty = prettify_tag(tag)
-    items = []
-    for p in posts:
-        img = p.get("hero_image_tag_page") or ""
-        img_html = f'<img src="{img}" alt="{p["title"]}">' if img else ""
-
-        items.append(f"""
+    for i, p in enumerate(posts):
+        img = rebase(p.hero_image_tag_page or "", prefix)
+        img_html = responsive_picture_html(
+            img, p.title, p.hero_image_info, f"{prefix}../generated/{IMAGE_SUBDIR}/", TAG_IMAGE_SIZES,
+        ) if img else ""
+
+        if i:
+            yield "\n"
+        yield f"""
         <div class="tag-item">
-          <a class="tag-item-link" href="{p["url_from_tag_page"]}">
+          <a class="tag-item-link" href="{rebase(p.url_from_tag_page, prefix)}">
             <div class="tag-item-img">{img_html}</div>
             <div class="tag-item-body">
               <div class="tag-item-tag">{tag_pretty}</div>
-              <div class="tag-item-title">{p["title"]}</div>
-              <div class="tag-item-date">{p.get("date","")}</div>
-              <div class="tag-item-tagline">{p.get("tagline","")}</div>
+              <div class="tag-item-title">{p.title}</div>
+              <div class="tag-item-date">{p.date}</div>
+              <div class="tag-item-tagline">{p.tagline}</div>
             </div>
           </a>
         </div>
         <div class="tag-divider"></div>
-        """)
-
-    items_html = "\n".join(items)
-
-    return f"""<!DOCTYPE html>
+        """
+
+def tag_page_slots(tag: str, posts: list[Post], root: str = "../../", prefix: str = "") -> dict:
+    return {
+        "root": root,
+        "tag": prettify_tag(tag),
+        "items": tag_page_items(tag, posts, prefix),
+        "page_links": "",
+        "pager": "",
+    }
+
+@lru_cache(maxsize=None)
+def tag_page_template() -> PageTemplate:
+    return PageTemplate(f"""<!DOCTYPE html>
 <html lang="en">
 <head>
   <meta charset="UTF-8">
-  <title>{tag_pretty} | Blog | Anand Lal</title>
+  <title>@@tag@@ | Blog | Anand Lal</title>
   <meta name="viewport" content="width=device-width, initial-scale=1.0">
 
   <link rel="preconnect" href="https://fonts.googleapis.com">
   <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
   <link href="https://fonts.googleapis.com/css2?family=Lato:wght@400;700&display=swap" rel="stylesheet">
 
-  <link rel="stylesheet" href="../../static/style.css">
-
-  <style>
-    .tag-page-wrap {{
-      max-width: 980px;
-      margin: 160px auto 90px;
-      padding: 0 40px;
-    }}
-
-    .tag-page-title {{
-      font-size: 34px;
-      font-weight: 700;
-      margin: 0 0 18px;
-    }}
-
-    .tag-item {{
-      padding: 22px 0;
-    }}
-
-    .tag-item-link {{
-      display: grid;
-      grid-template-columns: 320px 1fr;
-      gap: 22px;
-      text-decoration: none;
-      color: #000;
-      align-items: start;
-    }}
-
-    .tag-item-img {{
-      background: #e0e0e0;
-      border: 1px solid #e0e0e0;
-      height: 200px;
-      overflow: hidden;
-      display: flex;
-      align-items: center;
-      justify-content: center;
-    }}
-    .tag-item-img img {{
-      width: 100%;
-      height: 100%;
-      object-fit: cover;
-      display: block;
-    }}
-
-    .tag-item-tag {{
-      font-size: 12px;
-      font-weight: 700;
-      color: {ACCENT_RED};
-      text-transform: uppercase;
-      letter-spacing: 0.9px;
-      margin-bottom: 8px;
-    }}
-
-    .tag-item-title {{
-      font-size: 22px;
-      font-weight: 700;
-      line-height: 1.3;
-      margin-bottom: 10px;
-    }}
-
-    .tag-item-date {{
-      font-size: 13px;
-      color: #333;
-      margin-bottom: 10px;
-    }}
-
-    .tag-item-tagline {{
-      font-size: 14px;
-      color: #000;
-      line-height: 1.55;
-    }}
-
-    .tag-item-link:hover .tag-item-title {{
-      color: {ACCENT_RED};
-    }}
-
-    .tag-divider {{
-      height: 1px;
-      background: #000;
-      opacity: 0.18;
-      margin: 0;
-    }}
-
-    @media (max-width: 900px) {{
-      .tag-item-link {{
-        grid-template-columns: 1fr;
-      }}
-      .tag-item-img {{
-        height: 240px;
-      }}
-    }}
-  </style>
+  <link rel="stylesheet" href="@@root@@static/style.css">
+  <link rel="stylesheet" href="@@root@@static/{blog_stylesheet_name()}">@@page_links@@
 </head>
 
 <body>
 
 <header class="navbar">
   <div class="navbar-left">
-    <a href="../../index.html" class="logo">
-      <img src="../../Attachments/logo.jpg" alt="Anand Lal Logo">
+    <a href="@@root@@index.html" class="logo">
+      <img src="@@root@@Attachments/logo.jpg" alt="Anand Lal Logo">
     </a>
   </div>
 
   <nav class="navbar-right">
-    <a href="../../index.html">Home</a>
-    <a href="../../about.html">About Me</a>
-    <a href="../../poetry.html">Poetry</a>
-    <a href="../../photos.html">Photos</a>
-    <a href="../../blog.html" class="active">Blog</a>
+    <a href="@@root@@index.html">Home</a>
+    <a href="@@root@@about.html">About Me</a>
+    <a href="@@root@@poetry.html">Poetry</a>
+    <a href="@@root@@photos.html">Photos</a>
+    <a href="@@root@@blog.html" class="active">Blog</a>
   </nav>
 </header>
 
 <main class="tag-page-wrap">
-  <div class="tag-page-title">{tag_pretty}</div>
-  {items_html}
+  <div class="tag-page-title">@@tag@@</div>
+  @@items@@
+  @@pager@@
 </main>
 
 <footer class="site-footer">
@@ -809,141 +2172,849 @@ def wrap_tag_page(tag: str, posts: list[dict]) -> str:
 
 </body>
 </html>
-"""
+""")
+
+def wrap_tag_page(tag: str, posts: list[Post]) -> str:
+    return tag_page_template().render(**tag_page_slots(tag, posts))
 
 # ==============================
-# MAIN
+# PAGINATION
 # ==============================
+# Page 1 keeps its URL (blog.html, blogs/tags/<tag>.html). Page n lives at
+# <stem>/page/<n>.html next to it, two directories deeper, so links written
+# for page 1 get PAGE_PREFIX there.
+
+PAGE_PREFIX = "../../"
+
+def paged_path(first: Path, n: int) -> Path:
+    return first if n == 1 else first.parent / first.stem / "page" / f"{n}.html"
+
+def paged_key(key: str, n: int) -> str:
+    return key if n == 1 else f"{key.removesuffix('.html')}/page/{n}.html"
+
+def paged_href(first: Path, n: int, from_n: int) -> str:
+    """Link to page n of `first`'s series from page from_n."""
+    if from_n > 1:
+        return f"{n}.html" if n > 1 else PAGE_PREFIX + first.name
+    return first.name if n == 1 else f"{first.stem}/page/{n}.html"
+
+def pagination_slots(first: Path, n: int, has_next: bool) -> dict:
+    """rel=prev/next links for <head> and the pager below the list."""
+    if n == 1 and not has_next:
+        return {"page_links": "", "pager": ""}
+    links = []
+    nav = []
+    if n > 1:
+        href = paged_href(first, n - 1, n)
+        links.append(f'\n  <link rel="prev" href="{href}">')
+        nav.append(f'<a class="pager-prev" rel="prev" href="{href}">&larr; Previous</a>')
+    nav.append(f'<span class="pager-page">Page {n}</span>')
+    if has_next:
+        href = paged_href(first, n + 1, n)
+        links.append(f'\n  <link rel="next" href="{href}">')
+        nav.append(f'<a class="pager-next" rel="next" href="{href}">Next &rarr;</a>')
+    return {
+        "page_links": "".join(links),
+        "pager": f'<nav class="pager" aria-label="Pages">{"".join(nav)}</nav>',
+    }
+
+def write_paginated(first: Path, key: str, series_hash: str, context, page_size: int,
+                    posts, write, store: BuildStore):
+    """
+    Writes one paginated series (blog.html, a tag page). `posts()` yields
+    its posts in order; `write(path, page_posts, prefix, pagination_slots)`
+    renders one page. Each page is hashed from its own posts plus `context`
+    (whatever else is on every page), so when one post changes only the
+    pages whose contents shift are rewritten. `series_hash` covers the
+    whole series and skips it without reading any posts.
+    """
+    old = store.old_pages
+    n_old = int(old.get(f"{key}#pages", 0))
+    store.pages[f"{key}#series"] = series_hash
+    if n_old and old.get(f"{key}#series") == series_hash and all(
+        paged_key(key, n) in old and paged_path(first, n).exists() for n in range(1, n_old + 1)
+    ):
+        for n in range(1, n_old + 1):
+            store.pages[paged_key(key, n)] = old[paged_key(key, n)]
+        store.pages[f"{key}#pages"] = str(n_old)
+        WRITE_COUNTS["current"] += n_old
+        print(f"[SKIP] Unchanged: {first}" + (f" (+{n_old - 1} pages)" if n_old > 1 else ""))
+        return
 
-def main():
-    excel_path = Path(EXCEL_PATH)
-    obs_root = Path(OBSIDIAN_ROOT)
-    post_out = Path(POST_OUTPUT_DIR)
-    tag_out = Path(TAG_OUTPUT_DIR)
-
-    post_out.mkdir(parents=True, exist_ok=True)
-    tag_out.mkdir(parents=True, exist_ok=True)
-
-    if not excel_path.exists():
-        raise FileNotFoundError(f"Excel file not found: {excel_path}")
-    if not obs_root.exists():
-        raise FileNotFoundError(f"Obsidian root not found: {obs_root}")
-
-    df = pd.read_excel(excel_path)
-    required_cols = ["File Name", "Folder Name", "Desired URL Name", "Published (Y/N)", "Featured (Y/N)"]
-    for c in required_cols:
-        if c not in df.columns:
-            raise ValueError(f"Missing required column in Excel: {c}")
-
-    posts = []
-
-    # -------- Build posts & individual pages --------
-    for _, row in df.iterrows():
-        if not yn_to_bool(row["Published (Y/N)"]):
-            continue
-
-        file_name = str(row["File Name"]).strip()
-        folder_name = str(row["Folder Name"]).strip()
-        desired_url = str(row["Desired URL Name"]).strip()
-        featured = yn_to_bool(row["Featured (Y/N)"])
+    if page_size <= 0:
+        write_page(first, key, series_hash, store,
+                   lambda path: write(path, posts(), "", pagination_slots(first, 1, False)))
+        n = 1
+    else:
+        pages = batched(posts(), page_size)
+        page_posts = next(pages, [])
+        n = 0
+        while True:
+            n += 1
+            following = next(pages, None)
+            has_next = following is not None
+            page_hash = hash_json([template_key(), key, context, n, has_next,
+                                   [clean_record(p.to_dict()) for p in page_posts]])
+            write_page(paged_path(first, n), paged_key(key, n), page_hash, store,
+                       lambda path: write(path, page_posts, PAGE_PREFIX if n > 1 else "",
+                                          pagination_slots(first, n, has_next)))
+            if not has_next:
+                break
+            page_posts = following
+    store.pages[f"{key}#pages"] = str(n)
+
+    # Pages past the new end
+    remove_pages(first, after=n)
+
+def remove_pages(first: Path, after: int = 0):
+    """Deletes pages after..end of a paginated series; after=0 removes all of it."""
+    if after == 0 and first.exists():
+        first.unlink()
+        print(f"[OK] Removed: {first}")
+    page_dir = first.parent / first.stem / "page"
+    if page_dir.is_dir():
+        for path in page_dir.glob("*.html"):
+            if path.stem.isdigit() and int(path.stem) > after:
+                path.unlink()
+                print(f"[OK] Removed: {path}")
+        for d in (page_dir, page_dir.parent):
+            if not any(d.iterdir()):
+                d.rmdir()
 
-        if not desired_url:
-            desired_url = safe_slug(file_name)
-        slug = safe_slug(desired_url)
+# ==============================
+# POST RENDERING (runs in worker processes with --jobs)
+# ==============================
 
-        folder_path = obs_root / folder_name
-        md_path = find_markdown_file(folder_path, file_name)
-        if md_path is None:
-            print(f"[WARN] No markdown file found: Folder='{folder_name}', File='{file_name}'")
-            continue
+def render_post(job: dict) -> tuple[Post, dict]:
+    """
+    Renders one post from its raw Markdown (parsed exactly once: job["header"],
+    when set, is the PostHeader the frontmatter index scan already made). Pure
+    function of `job`, so it can run in a worker process; the parent does
+    all file writes. Returns (Post without generated_at, post_page_template() slots).
+    """
+    raw_md = job["raw_md"]
+    folder_name = job["folder_name"]
+    slug = job["slug"]
+    root = job.get("root", REL_TO_SITE_ROOT_FROM_POST + "/")
+
+    header = job.get("header")
+    if header is None:
+        with span("frontmatter", "post"):
+            header = parse_post_header(raw_md)
+    props = header.props
+
+    tags = prop_list(props, "tags")
+    date_str = prop_str(props, "date")
+    tagline = prop_str(props, "tagline")
+
+    content_md = raw_md[header.body_offset:]
+
+    # Title: first H1
+    title = header.title or job["file_name"]
+
+    # Image: first image in raw md
+    hero_site_root = extract_first_image_src(raw_md, folder_name, from_where="site_root")
+    hero_tag_page = extract_first_image_src(raw_md, folder_name, from_where="tag_page")
+    hero_post_page = extract_first_image_src(raw_md, folder_name, from_where="post_page")
+
+    # Rewrite images for post page markdown
+    processed_md = obsidian_md_to_web_md(content_md, folder_name, job.get("image_base"))
+    with span("markdown", "post"):
+        body_html = markdown_to_html(processed_md, job.get("markdown_backend"))
+    body_html = apply_responsive_images(body_html, job["images"], f"{IMAGE_SUBDIR}/", POST_IMAGE_SIZES)
+
+    header_block = make_post_header_block(tags=tags, title=title, date_str=date_str, root=root)
+    page_slots = {
+        "title": title,
+        "header_block": header_block,
+        "body": body_html,
+        "root": root,
+    }
+
+    post = Post(
+        title=title,
+        slug=slug,
+        folder=folder_name,
+        source_md=job["md_path"],
+        featured=job["featured"],
+        tags_raw=tags,
+        tags_pretty=[prettify_tag(t) for t in tags],
+        date=date_str,
+        tagline=tagline,
+        synopsis=make_synopsis(tagline, body_html),
+        url_site_root=f"blogs/generated/{slug}.html",
+        url_from_tag_page=f"../generated/{slug}.html",
+        hero_image=hero_site_root,
+        hero_image_tag_page=hero_tag_page,
+        hero_image_info=job["images"].get(hero_post_page),
+    )
+    return post, page_slots
+
+def render_post_spanned(job: dict) -> tuple[Post, dict]:
+    with span("post", "post", slug=job["slug"]):
+        return render_post(job)
+
+def render_post_traced(job: dict):
+    """Worker entry point under --trace: the result plus the worker's spans and counters."""
+    global TRACE
+    TRACE = BuildTrace()
+    try:
+        result = render_post_spanned(job)
+        return result, TRACE.events, TRACE.counters
+    finally:
+        TRACE = None
+
+class WorkerPool:
+    """
+    A process pool shared by every batch of a build, started on first use.
+    n_jobs <= 0 means one worker per CPU; 1 keeps everything in this process.
+    """
 
-        raw_md = read_text(md_path)
-        props = parse_obsidian_properties(raw_md)
-
-        tags = props.get("tags", [])
-        date_str = props.get("date", "")
-        tagline = props.get("tagline", "")
-
-        content_md = strip_frontmatter(raw_md)
-
-        # Title: first H1
-        title_match = re.search(r"^\s*#\s+(.+)\s*$", content_md, flags=re.M)
-        title = title_match.group(1).strip() if title_match else file_name
-
-        # Image: first image in raw md
-        hero_site_root = extract_first_image_src(raw_md, folder_name, from_where="site_root")
-        hero_tag_page = extract_first_image_src(raw_md, folder_name, from_where="tag_page")
-
-        # Rewrite images for post page markdown
-        processed_md = obsidian_md_to_web_md(content_md, folder_name)
-        body_html = markdown_to_html(processed_md)
-
-        header_block = make_post_header_block(tags=tags, title=title, date_str=date_str)
-        full_html = wrap_post_page(title, header_block, body_html)
-
-        out_path = post_out / f"{slug}.html"
-        write_text(out_path, full_html)
-        print(f"[OK] Generated post: {out_path}")
-
-        posts.append({
-            "title": title,
-            "slug": slug,
-            "folder": folder_name,
-            "source_md": str(md_path),
-            "featured": featured,
-            "tags_raw": tags,
-            "tags_pretty": [prettify_tag(t) for t in tags],
-            "date": date_str,
-            "tagline": tagline,
-            # Links:
-            "url_site_root": f"blogs/generated/{slug}.html",
-            "url_from_tag_page": f"../generated/{slug}.html",   # from blogs/tags/*.html
-            # Images:
-            "hero_image": hero_site_root,         # for blog.html at site root
-            "hero_image_tag_page": hero_tag_page, # for tag pages
-            "generated_at": datetime.datetime.now().isoformat(timespec="seconds"),
-        })
+    def __init__(self, n_jobs: int):
+        self.n_jobs = n_jobs if n_jobs > 0 else (os.cpu_count() or 1)
+        self.executor = None
+
+    def parallel(self, n_items: int) -> bool:
+        return min(self.n_jobs, n_items) > 1
+
+    def map(self, fn, items: list) -> list:
+        """Results in item order, so the output is identical either way."""
+        if not self.parallel(len(items)):
+            return [fn(item) for item in items]
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.n_jobs)
+        chunksize = max(1, len(items) // (self.n_jobs * 4))
+        return list(self.executor.map(fn, items, chunksize=chunksize))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+def render_posts(jobs: list[dict], pool: WorkerPool) -> list[tuple[Post, dict]]:
+    """Renders jobs serially or in the pool, in job order."""
+    if not pool.parallel(len(jobs)):
+        return [render_post_spanned(job) for job in jobs]
+    if TRACE is None:
+        return pool.map(render_post, jobs)
+    results = []
+    for result, events, counters in pool.map(render_post_traced, jobs):
+        TRACE.merge(events, counters)
+        results.append(result)
+    return results
 
-    # Write JSON index (useful later for carousels, search, etc.)
-    blog_json_path = post_out / "blog.json"
-    write_text(blog_json_path, json.dumps(posts, indent=2))
-    print(f"[OK] Wrote: {blog_json_path}")
+# ==============================
+# SEARCH INDEX (blogs/generated/search/)
+# ==============================
+# index.json          docs, tag/year facets, average length and the shard list
+# <prefix>.<hash>.json  postings {term: [[doc id, tf], ...]} for every term
+#                      starting with <prefix>; named by content hash, so an
+#                      unchanged shard is never rewritten and can be cached forever.
+# Per-post term frequencies are kept in the build manifest, so only changed
+# posts are re-tokenized.
+
+SEARCH_TOKEN_RE = re.compile(r"[a-z0-9]+")
+HTML_TAG_RE = re.compile(r"<[^>]+>")
+SEARCH_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or "
+    "that the this to was were will with".split()
+)
+# (suffix, replacement): first match wins, and at least 3 characters must remain
+SEARCH_STEM_RULES = (
+    ("ational", "ate"), ("ization", "ize"), ("fulness", "ful"), ("iveness", "ive"),
+    ("ingly", ""), ("edly", ""), ("ments", ""), ("ment", ""), ("ness", ""),
+    ("ies", "y"), ("ied", "y"), ("ing", ""), ("ed", ""), ("ly", ""), ("s", ""),
+)
 
-    if not posts:
-        print("[WARN] No posts published; skipping blog.html/tag pages.")
+def fold_text(text: str) -> str:
+    """Lowercase and strip accents ("Café" -> "cafe"); drops all marks (category M), as blog-search.js does."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.category(c).startswith("M")).lower()
+
+def search_stem(word: str) -> str:
+    for suffix, repl in SEARCH_STEM_RULES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            if suffix == "s" and word.endswith(("ss", "us", "is")):
+                return word
+            return word[:-len(suffix)] + repl
+    return word
+
+def search_tokens(text: str) -> list[str]:
+    return [
+        search_stem(t)
+        for t in SEARCH_TOKEN_RE.findall(fold_text(text))
+        if len(t) >= 2 and t not in SEARCH_STOPWORDS
+    ]
+
+def search_terms(post: Post, body_html: str) -> dict:
+    """Field-weighted term frequencies for one post."""
+    texts = {
+        "title": post.title,
+        "tagline": post.tagline or "",
+        "tags": " ".join(post.tags_pretty),
+        "body": html_lib.unescape(HTML_TAG_RE.sub(" ", body_html)),
+    }
+    tf = {}
+    for field, text in texts.items():
+        weight = SEARCH_FIELD_WEIGHTS[field]
+        for term in search_tokens(text):
+            tf[term] = tf.get(term, 0) + weight
+    return dict(sorted(tf.items()))
+
+def write_search_shard(out_dir: Path, prefix: str, rows) -> tuple[str, bool]:
+    """
+    Streams one shard ({term: [[doc id, tf], ...]}) from (term, doc id, tf)
+    rows sorted by term and doc id. Returns (file name, written).
+    """
+    def chunks():
+        term = None
+        for t, doc_id, tf in rows:
+            if t != term:
+                yield ("{" if term is None else "]],") + json.dumps(t) + ":[["
+                term = t
+            else:
+                yield "],["
+            yield f"{doc_id},{tf}"
+        yield "{}" if term is None else "]]}"
+
+    # Named by content hash, so the bytes are only known to be new once written
+    tmp_path, size, digest = stream_to_temp(out_dir / f"{prefix}.json", chunks())
+    name = f"{prefix}.{digest.hex()[:SEARCH_HASH_LEN]}.json"
+    if (out_dir / name).exists():
+        tmp_path.unlink()
+        WRITE_COUNTS["unchanged"] += 1
+        return name, False
+    replace_file(tmp_path, out_dir / name)
+    WRITE_COUNTS["written"] += 1
+    count_bytes("written", size)
+    return name, True
+
+def search_index_chunks(store: BuildStore, shards: dict):
+    """index.json, streamed; same layout as json.dumps(index, separators=(",", ":"))."""
+    db = store.db
+    compact = {"separators": (",", ":")}
+    total_len = db.execute("SELECT COALESCE(SUM(search_len), 0) FROM posts").fetchone()[0]
+
+    yield (f'{{"version":{SEARCH_INDEX_VERSION},"prefix_len":{SEARCH_PREFIX_LEN},'
+           f'"avg_len":{json.dumps(total_len / store.n_posts if store.n_posts else 0)},"docs":[')
+    for doc_id, (text, n) in enumerate(db.execute("SELECT post, search_len FROM posts ORDER BY id")):
+        post = json.loads(text)
+        doc = {
+            "title": post["title"],
+            "url": post["url_site_root"],
+            "date": post["date"] or "",
+            "tagline": post["tagline"] or "",
+            "tags": post["tags_pretty"],
+            "len": n,
+        }
+        yield ("," if doc_id else "") + json.dumps(doc, **compact)
+
+    # Tag facets are keyed by slug, so raw tags that prettify alike share one
+    tag_facets = {}     # slug -> (label, [raw tags]), in first-seen order
+    for (t,) in db.execute("SELECT tag FROM post_tags GROUP BY tag ORDER BY MIN(rowid)"):
+        tag_facets.setdefault(safe_tag_slug(t), (prettify_tag(t), []))[1].append(t)
+    yield '],"facets":{"tags":{'
+    for i, (slug, (label, raw_tags)) in enumerate(sorted(tag_facets.items(), key=lambda kv: kv[1][0].lower())):
+        marks = ",".join("?" * len(raw_tags))
+        docs = db.execute(f"SELECT post_id FROM post_tags WHERE tag IN ({marks}) ORDER BY rowid", raw_tags)
+        yield (("," if i else "") + json.dumps(slug) + ':{"label":' + json.dumps(label) + ',"docs":['
+               + ",".join(str(doc_id) for (doc_id,) in docs) + "]}")
+
+    # Years are a list, newest first: JS objects iterate integer-like keys in ascending order
+    yield '},"years":['
+    years = [y for (y,) in db.execute("SELECT DISTINCT substr(date, 1, 4) FROM posts") if y.isdigit()]
+    for i, year in enumerate(sorted(years, reverse=True)):
+        docs = db.execute("SELECT id FROM posts WHERE substr(date, 1, 4) = ? ORDER BY id", (year,))
+        yield (("," if i else "") + '{"year":' + json.dumps(year) + ',"docs":['
+               + ",".join(str(doc_id) for (doc_id,) in docs) + "]}")
+    yield ']},"shards":' + json.dumps(shards, **compact) + "}"
+
+def build_search_index(store: BuildStore, out_dir: Path):
+    """
+    Rebuilds the index when any post's record or terms changed. Postings are
+    spilled to a temporary table and streamed out one shard at a time.
+    """
+    index_path = out_dir / SEARCH_INDEX_NAME
+    key = f"{SEARCH_SUBDIR}/{SEARCH_INDEX_NAME}"
+    inputs_hash = store.page_hash("search", SEARCH_INDEX_VERSION)
+    store.pages[key] = inputs_hash
+    if page_is_current(store.old_pages, key, index_path, inputs_hash):
+        WRITE_COUNTS["current"] += 1
+        print(f"[SKIP] Unchanged: {index_path}")
         return
 
-    # -------- Build blog.html (featured posts) --------
-    featured_posts = [p for p in posts if p["featured"]]
+    db = store.db
+    db.execute("CREATE TEMP TABLE postings (prefix TEXT, term TEXT, doc INTEGER, tf INTEGER)")
+    for doc_id, terms_json in db.execute("SELECT id, terms FROM posts ORDER BY id"):
+        db.executemany("INSERT INTO postings VALUES (?, ?, ?, ?)", [
+            (term[:SEARCH_PREFIX_LEN], term, doc_id, tf) for term, tf in json.loads(terms_json).items()
+        ])
+    db.execute("CREATE INDEX temp.postings_order ON postings (prefix, term, doc)")
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    shards = {}
+    written = 0
+    prefixes = [p for (p,) in db.execute("SELECT DISTINCT prefix FROM postings ORDER BY prefix")]
+    for prefix in prefixes:
+        rows = db.execute("SELECT term, doc, tf FROM postings WHERE prefix = ? ORDER BY term, doc", (prefix,))
+        shards[prefix], was_written = write_search_shard(out_dir, prefix, rows)
+        written += was_written
+    n_terms = db.execute("SELECT COUNT(DISTINCT term) FROM postings").fetchone()[0]
+    db.execute("DROP TABLE temp.postings")
+
+    # Shards no longer referenced by the index
+    live = set(shards.values())
+    for path in out_dir.glob("*.json"):
+        if path.name != SEARCH_INDEX_NAME and path.name not in live:
+            path.unlink()
+
+    if write_chunks(index_path, search_index_chunks(store, shards)):
+        print(f"[OK] Wrote: {index_path}")
+    else:
+        print(f"[SKIP] Identical: {index_path}")
+    print(f"[INFO] Search index: {store.n_posts} posts, {n_terms} terms, "
+          f"{len(shards)} shards ({written} written)")
+
+def featured_or_all(posts: list[Post]) -> list[Post]:
+    featured_posts = [p for p in posts if p.featured]
     # If none are featured, fall back to all
-    if not featured_posts:
-        featured_posts = posts
+    return featured_posts or posts
 
-    # -------- Categories from tags (auto-updating) --------
+def group_by_tag(posts: list[Post]) -> tuple[list[str], dict]:
+    """
+    (all tags sorted by pretty name, {tag: posts newest-first}).
+    """
     tag_set = set()
     for p in posts:
-        for t in p["tags_raw"]:
+        for t in p.tags_raw:
             tag_set.add(t)
     all_tags = sorted(tag_set, key=lambda x: prettify_tag(x).lower())
 
-    blog_html = wrap_blog_index_page(featured_posts=featured_posts, all_tags=all_tags)
-    write_text(Path(BLOG_INDEX_OUTPUT), blog_html)
-    print(f"[OK] Wrote blog index: {BLOG_INDEX_OUTPUT}")
-
-    # -------- Build tag subpages --------
     tag_to_posts = {t: [] for t in all_tags}
     for p in posts:
-        for t in p["tags_raw"]:
+        for t in p.tags_raw:
             tag_to_posts.setdefault(t, []).append(p)
-
     for t, plist in tag_to_posts.items():
         # newest-first if you use ISO date; otherwise it will still be stable
-        plist_sorted = sorted(plist, key=lambda x: (x.get("date") or ""), reverse=True)
-        tag_slug = safe_tag_slug(t)
-        tag_page_html = wrap_tag_page(t, plist_sorted)
-        out_path = Path(TAG_OUTPUT_DIR) / f"{tag_slug}.html"
-        write_text(out_path, tag_page_html)
-        print(f"[OK] Generated tag page: {out_path}")
+        tag_to_posts[t] = sorted(plist, key=lambda x: (x.date or ""), reverse=True)
+    return all_tags, tag_to_posts
+
+# ==============================
+# PRECOMPRESSION / SERVER SIGNAL
+# ==============================
+
+def import_site_module(name: str):
+    """precompress.py and serve.py live at the site root, one level up."""
+    import importlib
+
+    site_root = str(Path(__file__).resolve().parent.parent)
+    if site_root not in sys.path:
+        sys.path.insert(0, site_root)
+    return importlib.import_module(name)
+
+def precompress_outputs():
+    """Write .gz/.br siblings for everything this script generates."""
+    precompress_paths = import_site_module("precompress").precompress_paths
+    blog_pages = Path(BLOG_INDEX_OUTPUT).with_suffix("")
+    precompress_paths([POST_OUTPUT_DIR, TAG_OUTPUT_DIR, BLOG_INDEX_OUTPUT, blog_pages, STATIC_DIR])
+
+def signal_rebuild():
+    """
+    Touch the stamp serve.py watches so its hot-file cache starts over (and
+    live reload fires). Written directly, not through write_chunks: it must
+    change on every build, even two in the same second.
+    """
+    stamp = Path(REBUILD_STAMP)
+    stamp.parent.mkdir(parents=True, exist_ok=True)
+    stamp.write_text(f"{datetime.datetime.now().isoformat(timespec='seconds')} {time.time_ns()}\n",
+                     encoding="utf-8")
+
+def finish_build(args):
+    if args.precompress:
+        with span("precompress"):
+            precompress_outputs()
+    written = WRITE_COUNTS["written"]
+    print(f"[INFO] Output files: {written} written; left untouched: {WRITE_COUNTS['unchanged']} identical, "
+          f"{WRITE_COUNTS['current']} up to date")
+    if written:
+        signal_rebuild()
+    report_peak_rss()
+
+def report_peak_rss():
+    peak = peak_rss_bytes()
+    if peak is None:
+        return
+    main_rss, worker_rss = peak
+    workers = f", largest child process {worker_rss / 2**20:.1f} MB" if worker_rss else ""
+    print(f"[INFO] Peak RSS: {main_rss / 2**20:.1f} MB{workers}")
+
+# ==============================
+# WATCH MODE (--watch)
+# ==============================
+# Every rebuild goes through build(), so the manifest keeps it incremental:
+# only changed posts are re-rendered and only tag pages whose posts changed
+# are rewritten. The index file is re-read only when it changed.
+
+def index_file(source: str) -> Path | None:
+    path = {"excel": EXCEL_PATH, "csv": CSV_PATH}.get(source)
+    return Path(path).resolve() if path else None
+
+def watch(args):
+    """Rebuild on changes until Ctrl+C; serve the site with live reload unless --no-serve."""
+    try:
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+    except ImportError:
+        raise SystemExit("--watch needs watchdog: pip install watchdog")
+
+    obs_root = Path(OBSIDIAN_ROOT).resolve()
+    index_path = index_file(args.index)
+    changed = set()
+    lock = threading.Lock()
+    wake = threading.Event()
+
+    # The build's own outputs, in case they are configured inside a watched folder
+    outputs = [Path(p).resolve() for p in (
+        POST_OUTPUT_DIR, TAG_OUTPUT_DIR, BLOG_INDEX_OUTPUT, Path(BLOG_INDEX_OUTPUT).with_suffix(""),
+        PREVIEW_JSON_OUTPUT, STATIC_DIR, REBUILD_STAMP,
+    )]
+
+    def relevant(path: Path) -> bool:
+        if any(path == out or out in path.parents for out in outputs):
+            return False
+        if path == index_path:
+            return True
+        return obs_root in path.parents and not WATCH_IGNORE_RE.search(str(path.relative_to(obs_root)))
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.event_type not in WATCH_EVENT_TYPES:
+                return
+            if event.is_directory and event.event_type == "modified":
+                return
+            for p in (event.src_path, getattr(event, "dest_path", "")):
+                if p and relevant(Path(os.fsdecode(p)).resolve()):
+                    with lock:
+                        changed.add(Path(os.fsdecode(p)).resolve())
+                    wake.set()
+
+    observer = Observer()
+    observer.schedule(Handler(), str(obs_root), recursive=True)
+    if index_path is not None:
+        observer.schedule(Handler(), str(index_path.parent), recursive=False)
+    observer.start()
+
+    httpd = None
+    if not args.no_serve:
+        serve = import_site_module("serve")
+        site_root = Path(BLOG_INDEX_OUTPUT).resolve().parent
+        httpd = serve.make_server(site_root, args.host, args.port, livereload=True)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        print(f"[INFO] Serving {site_root} at http://{args.host}:{args.port}/ (live reload)")
+
+    print(f"[INFO] Watching {obs_root}" + (f" and {index_path}" if index_path else "") + " (Ctrl+C to stop)")
+    rows = load_index(args.index, obs_root)
+    try:
+        while True:
+            wake.wait()
+            while wake.wait(WATCH_DEBOUNCE):     # wait for the burst to end
+                wake.clear()
+            with lock:
+                paths = sorted(changed)
+                changed.clear()
+            wake.clear()
+            if not paths:
+                continue
+
+            t0 = time.perf_counter()
+            try:
+                if index_path in paths or (args.index == "frontmatter" and any(p.suffix == ".md" for p in paths)):
+                    rows = load_index(args.index, obs_root)
+                build(args, rows)
+            except Exception as e:  # keep watching; the next save usually fixes it
+                print(f"[WARN] Rebuild failed: {type(e).__name__}: {e}")
+                continue
+            names = ", ".join(p.name for p in paths[:3]) + (f" (+{len(paths) - 3})" if len(paths) > 3 else "")
+            print(f"[OK] Rebuilt in {(time.perf_counter() - t0) * 1000:.0f} ms after changes to {names}")
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    finally:
+        observer.stop()
+        observer.join()
+        if httpd is not None:
+            httpd.shutdown()
+            httpd.server_close()
+
+# ==============================
+# MAIN
+# ==============================
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Generate blog post, tag and index pages from the Obsidian vault.")
+    ap.add_argument(
+        "--force", action="store_true",
+        help="ignore the build manifest and regenerate every page",
+    )
+    ap.add_argument(
+        "--index", choices=sorted(INDEX_LOADERS), default=INDEX_SOURCE,
+        help=f"where the post index comes from (default: {INDEX_SOURCE})",
+    )
+    ap.add_argument(
+        "--markdown-backend", choices=sorted(MARKDOWN_BACKENDS), default=MARKDOWN_BACKEND,
+        help=f"Markdown renderer (default: {MARKDOWN_BACKEND})",
+    )
+    ap.add_argument(
+        "--jobs", "-j", type=int, default=1, metavar="N",
+        help="render posts in N worker processes (0 = one per CPU; default: 1)",
+    )
+    ap.add_argument(
+        "--image-jobs", type=int, default=0, metavar="N",
+        help="encode image derivatives in N worker processes (default: 0 = one per CPU)",
+    )
+    ap.add_argument(
+        "--precompress", action="store_true",
+        help="write .gz/.br siblings for the generated text assets (see precompress.py)",
+    )
+    ap.add_argument(
+        "--index-page-size", type=int, default=INDEX_PAGE_SIZE, metavar="N",
+        help=f"featured cards per blog.html page, 0 for one page (default: {INDEX_PAGE_SIZE})",
+    )
+    ap.add_argument(
+        "--tag-page-size", type=int, default=TAG_PAGE_SIZE, metavar="N",
+        help=f"posts per tag page, 0 for one page (default: {TAG_PAGE_SIZE})",
+    )
+    ap.add_argument(
+        "--watch", action="store_true",
+        help="after building, rebuild on vault/index changes and serve the site with live reload (needs watchdog)",
+    )
+    ap.add_argument(
+        "--no-serve", action="store_true",
+        help="with --watch: only rebuild (e.g. when serve.py --livereload is already running)",
+    )
+    ap.add_argument("--host", default=WATCH_HOST, help=f"--watch server host (default: {WATCH_HOST})")
+    ap.add_argument("--port", type=int, default=WATCH_PORT, help=f"--watch server port (default: {WATCH_PORT})")
+    ap.add_argument(
+        "--trace", action="store_true",
+        help="time every stage and post; print a summary and write build_trace.json/.folded",
+    )
+    ap.add_argument(
+        "--profile", action="store_true",
+        help="--trace plus a cProfile run of the main process (build.pstats)",
+    )
+    ap.add_argument(
+        "--profile-dir", default=PROFILE_DIR, metavar="DIR",
+        help=f"where --trace/--profile output goes (default: {PROFILE_DIR})",
+    )
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    global TRACE
+    args = parse_args(argv)
+    if not (args.trace or args.profile):
+        build(args)
+        if args.watch:
+            watch(args)
+        return
+
+    import cProfile
+
+    TRACE = BuildTrace()
+    profiler = cProfile.Profile() if args.profile else None
+    try:
+        with span("build"):
+            if profiler is not None:
+                profiler.enable()
+            try:
+                build(args)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+    finally:
+        trace, TRACE = TRACE, None
+    write_build_profile(trace, profiler, Path(args.profile_dir))
+    if args.watch:
+        watch(args)
+
+def build(args, rows: list[dict] | None = None):
+    obs_root = Path(OBSIDIAN_ROOT)
+    post_out = Path(POST_OUTPUT_DIR)
+    tag_out = Path(TAG_OUTPUT_DIR)
+
+    post_out.mkdir(parents=True, exist_ok=True)
+    tag_out.mkdir(parents=True, exist_ok=True)
+
+    WRITE_COUNTS.update(written=0, unchanged=0, current=0)
+    with span("stylesheet"):
+        write_blog_stylesheet(Path(STATIC_DIR))
+
+    if not obs_root.exists():
+        raise FileNotFoundError(f"Obsidian root not found: {obs_root}")
+
+    if rows is None:
+        with span("index_load", source=args.index):
+            rows = load_index(args.index, obs_root)
+
+    if available_image_formats() is None:
+        print("[WARN] Pillow not installed; linking original images (pip install Pillow).")
+
+    store = BuildStore(post_out / MANIFEST_NAME, force=args.force)
+    try:
+        rendered = stream_posts(args, rows, obs_root, post_out, store)
+        print(f"[INFO] Posts rendered: {rendered}, unchanged: {store.n_posts - rendered}")
+        write_indexes(args, store, post_out)
+        store.commit()
+    except BaseException:
+        store.discard()
+        raise
+    finish_build(args)
+
+def stream_posts(args, rows: list[dict], obs_root: Path, post_out: Path, store: BuildStore) -> int:
+    """
+    Collects, renders and writes posts BUILD_BATCH at a time, adding each
+    to the manifest (unchanged ones are copied over from the last build).
+    Returns how many posts were rendered.
+    """
+    rendered = 0
+    epoch = source_date_epoch()
+    with WorkerPool(args.jobs) as render_pool, WorkerPool(args.image_jobs) as image_pool:
+        for batch in batched(iter_published(rows, obs_root), BUILD_BATCH):
+            jobs = []
+            # (slug, manifest entry, cached (entry, post, terms) or index into jobs), in index order
+            order = []
+            batch_image_refs = []
+
+            # -------- Collect posts (unchanged ones come from the manifest) --------
+            with span("collect"):
+                for row, file_name, folder_name, slug, featured, md_path in batch:
+                    raw_bytes = md_path.read_bytes()
+                    count_bytes("read", len(raw_bytes))
+                    raw_md = raw_bytes.decode("utf-8", errors="replace")
+                    image_refs = local_image_refs(raw_md, folder_name)
+                    entry = {
+                        "md_hash": hash_bytes(raw_bytes),
+                        "row_hash": hash_row(row),
+                        "images_key": image_refs_key(image_refs, obs_root),
+                        "markdown_backend": args.markdown_backend,
+                        "source_date_epoch": epoch,
+                    }
+                    out_path = post_out / f"{slug}.html"
+
+                    batch_image_refs.extend(image_refs)
+
+                    cached = store.old_post(slug)
+                    if cached and cached[0] == entry and out_path.exists():
+                        order.append((slug, entry, cached))
+                        continue
+
+                    jobs.append({
+                        "raw_md": raw_md,
+                        "md_path": str(md_path),
+                        "file_name": file_name,
+                        "folder_name": folder_name,
+                        "slug": slug,
+                        "featured": featured,
+                        "image_refs": image_refs,
+                        "markdown_backend": args.markdown_backend,
+                    })
+                    scanned = row.get(ROW_HEADER)
+                    if scanned and scanned[0] == entry["md_hash"]:
+                        jobs[-1]["header"] = scanned[1]
+                    order.append((slug, entry, len(jobs) - 1))
+
+            # -------- Resize images (cached by content hash) --------
+            with span("images"):
+                images = build_image_derivatives(
+                    list(dict.fromkeys(batch_image_refs)), obs_root, post_out / IMAGE_SUBDIR, image_pool, store,
+                )
+            for job in jobs:
+                job["images"] = {ref: images[ref] for ref in job.pop("image_refs") if ref in images}
+
+            # -------- Render changed posts (optionally in a worker pool) --------
+            with span("render", posts=len(jobs), jobs=args.jobs):
+                results = render_posts(jobs, render_pool)
+
+            with span("write_posts"):
+                for slug, entry, cached in order:
+                    if not isinstance(cached, int):
+                        _, record, terms = cached
+                        store.add_post(slug, entry, record, terms)
+                        WRITE_COUNTS["current"] += 1
+                        continue
+
+                    post, page_slots = results[cached]
+                    out_path = post_out / f"{slug}.html"
+                    if write_template(out_path, post_page_template(), **page_slots):
+                        print(f"[OK] Generated post: {out_path}")
+                    else:
+                        print(f"[SKIP] Identical: {out_path}")
+
+                    post.generated_at = post_timestamp(Path(jobs[cached]["md_path"]), epoch)
+                    store.add_post(slug, entry, post.to_dict(), search_terms(post, page_slots["body"]))
+            rendered += len(jobs)
+
+    for slug in store.dropped_slugs():
+        path = post_out / f"{slug}.html"
+        if path.exists():
+            path.unlink()
+            print(f"[OK] Removed: {path}")
+    prune_image_derivatives(post_out / IMAGE_SUBDIR, store)
+    return rendered
+
+def write_indexes(args, store: BuildStore, post_out: Path):
+    """blog.json, blog_posts.json, the search index, blog.html and the tag pages."""
+    # Write JSON index (useful later for carousels, search, etc.)
+    # Both JSON formats come from the same Post records.
+    with span("blog_json"):
+        write_page(post_out / "blog.json", "blog.json", store.page_hash("records"), store,
+                   lambda path: write_chunks(path, json_array_chunks(store.records(), 2)))
+        write_page(Path(PREVIEW_JSON_OUTPUT), "blog_posts.json", store.page_hash("posts"), store,
+                   lambda path: write_chunks(path, json_array_chunks(
+                       (p.to_preview() for p in store.posts()), 4)))
+
+    # -------- Search index (only changed shards are rewritten) --------
+    with span("search_index"):
+        build_search_index(store, post_out / SEARCH_SUBDIR)
+
+    # Tags no post has any more: their whole page series goes
+    for tag_slug in store.dropped_tag_slugs():
+        remove_pages(Path(TAG_OUTPUT_DIR) / f"{tag_slug}.html")
+
+    if not store.n_posts:
+        print("[WARN] No posts published; skipping blog.html/tag pages.")
+        return
+
+    # -------- Categories from tags (auto-updating) --------
+    with span("tag_aggregation"):
+        all_tags = store.tags()
+
+    # -------- Build blog.html (featured posts), paginated --------
+    with span("blog_index"):
+        series = "featured" if store.n_featured else "posts"
+        write_paginated(
+            Path(BLOG_INDEX_OUTPUT), "blog.html", store.page_hash(series, all_tags, args.index_page_size),
+            all_tags, args.index_page_size, store.featured_or_all,
+            lambda path, posts, prefix, pager: write_template(
+                path, blog_index_template(),
+                **{**blog_index_slots(posts, all_tags, root=prefix, prefix=prefix), **pager}),
+            store,
+        )
+
+    # -------- Build tag subpages, paginated --------
+    with span("tag_pages", tags=len(all_tags)):
+        for t in all_tags:
+            tag_slug = safe_tag_slug(t)
+            write_paginated(
+                Path(TAG_OUTPUT_DIR) / f"{tag_slug}.html", f"tags/{tag_slug}.html",
+                store.page_hash(f"tag:{t}", t, args.tag_page_size),
+                t, args.tag_page_size, lambda: store.tag_posts(t),
+                lambda path, posts, prefix, pager: write_template(
+                    path, tag_page_template(),
+                    **{**tag_page_slots(t, posts, root="../../" + prefix, prefix=prefix), **pager}),
+                store,
+            )
 
 if __name__ == "__main__":
     main()
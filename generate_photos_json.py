@@ -3,27 +3,367 @@
 Created on Mon Dec 22 21:10:45 2025
 
 @author: nlal
+
+Builds Attachments/photos/photos.json (root index) and its page shards
+for the gallery on photos.html.
+
+For every image it records the display size (after EXIF rotation), byte size,
+EXIF orientation and capture date, a grid-sized thumbnail and a tiny
+blurred placeholder (LQIP) so the grid can reserve space before the real
+thumbnail arrives.
+
+Folders are scanned recursively with os.scandir. photos_cache.json keeps each
+folder's (mtime, size, inode) and each file's record, so a rerun skips
+unchanged folders and only opens new or changed files. photos.json is only
+rewritten when its content changes. --watch keeps it up to date from
+filesystem events (needs watchdog).
+
+Needs Pillow: pip install Pillow
 """
 
 import os
+import io
 import json
+import base64
+import hashlib
+import argparse
+import datetime
+import threading
+
+from PIL import Image, ImageOps
 
 BASE_DIR = "Attachments/photos"
+OUTPUT_NAME = "photos.json"
+CACHE_NAME = "photos_cache.json"
+CACHE_VERSION = 2
+
+# photos.json is a small root index (folders, counts, shard URLs). The records
+# themselves go into fixed-size page shards in Attachments/photos/pages/, named
+# <folder>.<page>.<content hash>.json so they can be cached with a long max-age.
+SHARD_DIR_NAME = "pages"
+SHARD_SIZE = 6  # matches PAGE_SIZE in photos.html
+SHARD_HASH_LEN = 10
+MANIFEST_VERSION = 2
+
+# Thumbnails live in Attachments/photos/thumbs/<folder>/ (not scanned as a gallery folder).
+THUMB_DIR_NAME = "thumbs"
+# Longest edge of a grid thumbnail: tiles are ~360x220 CSS px, so this covers 2x screens.
+THUMB_SIZE = 720
+THUMB_QUALITY = 80
+LQIP_SIZE = 16
+LQIP_QUALITY = 40
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+# --watch reacts only to these watchdog events; reads (ours included, e.g.
+# opening each photo for EXIF) also raise "opened" / "closed_no_write".
+WATCH_EVENT_TYPES = {"created", "modified", "deleted", "moved", "closed"}
+
+EXIF_ORIENTATION = 0x0112
+EXIF_DATETIME = 0x0132
+EXIF_IFD = 0x8769
+EXIF_DATETIME_ORIGINAL = 0x9003
+
+def load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except ValueError:
+        return default
+
+def exif_info(im):
+    exif = im.getexif()
+    orientation = exif.get(EXIF_ORIENTATION, 1)
+    taken = exif.get_ifd(EXIF_IFD).get(EXIF_DATETIME_ORIGINAL) or exif.get(EXIF_DATETIME)
+    if taken:
+        try:
+            taken = datetime.datetime.strptime(str(taken).strip("\x00 "), "%Y:%m:%d %H:%M:%S").isoformat()
+        except ValueError:
+            taken = None
+    return orientation, taken
+
+def to_rgb(im):
+    if im.mode in ("RGBA", "LA", "P"):
+        im = im.convert("RGBA")
+        flat = Image.new("RGB", im.size, (255, 255, 255))
+        flat.paste(im, mask=im.getchannel("A"))
+        return flat
+    return im.convert("RGB")
+
+def describe_photo(path, folder, file_name):
+    """
+    Opens one image and writes its thumbnail. Returns the photos.json record,
+    or None (with a warning) if the file can't be read yet: a truncated or
+    half-copied image shouldn't take the whole build down.
+    """
+    try:
+        return read_photo(path, folder, file_name, file_digest(path))
+    except (OSError, ValueError, SyntaxError, Image.DecompressionBombError) as e:
+        print(f"[WARN] Skipping {folder}/{file_name}: {type(e).__name__}: {e}")
+        return None
+
+def read_photo(path, folder, file_name, digest):
+    with Image.open(path) as im:
+        orientation, taken = exif_info(im)
+        im = to_rgb(ImageOps.exif_transpose(im))
+        width, height = im.size
+
+        thumb = im.copy()
+        thumb.thumbnail((THUMB_SIZE, THUMB_SIZE), Image.LANCZOS)
+        stem = os.path.splitext(file_name)[0]
+        thumb_rel = f"{THUMB_DIR_NAME}/{folder}/{stem}.{digest[:10]}.jpg"
+        thumb_path = os.path.join(BASE_DIR, thumb_rel)
+        os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+        thumb.save(thumb_path, "JPEG", quality=THUMB_QUALITY, optimize=True, progressive=True)
+
+        lqip = im.copy()
+        lqip.thumbnail((LQIP_SIZE, LQIP_SIZE), Image.BILINEAR)
+        buf = io.BytesIO()
+        lqip.save(buf, "JPEG", quality=LQIP_QUALITY)
+
+    return {
+        "file": file_name,
+        "width": width,
+        "height": height,
+        "bytes": os.path.getsize(path),
+        "orientation": orientation,
+        "taken": taken,
+        "thumb": thumb_rel,
+        "thumb_width": thumb.width,
+        "thumb_height": thumb.height,
+        "lqip": "data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode("ascii"),
+    }
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def dir_signature(st):
+    return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+def scan_dir(rel, old_dirs, dirs, dirty, stats):
+    """
+    Scans BASE_DIR/<rel> and its subfolders into `dirs`.
+
+    A folder whose (mtime, size, inode) matches the cache is not listed again;
+    its file list and records are reused. Files in a folder that did change
+    are only opened when their own (mtime, size, inode) changed.
+    Folders in `dirty` (from --watch events) are always relisted, because
+    editing a file in place doesn't touch its folder's mtime.
+    """
+    path = os.path.join(BASE_DIR, rel) if rel else BASE_DIR
+    sig = dir_signature(os.stat(path))
+    old = old_dirs.get(rel)
+
+    if old and old["stat"] == sig and rel not in dirty:
+        entry = old
+        stats["dirs_skipped"] += 1
+    else:
+        old_files = old["files"] if old else {}
+        files = {}
+        subdirs = []
+        complete = True
+        with os.scandir(path) as it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    if not (rel == "" and e.name in (THUMB_DIR_NAME, SHARD_DIR_NAME)):
+                        subdirs.append(e.name)
+                    continue
+                # Only subfolders are gallery folders; skip files at the top level.
+                if not rel or not e.is_file() or not e.name.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+
+                st = e.stat()
+                fsig = [st.st_mtime_ns, st.st_size, st.st_ino]
+                cached = old_files.get(e.name)
+                if (
+                    cached
+                    and cached["stat"] == fsig
+                    and os.path.exists(os.path.join(BASE_DIR, cached["record"]["thumb"]))
+                ):
+                    record = cached["record"]
+                else:
+                    record = describe_photo(e.path, rel, e.name)
+                    if record is None:
+                        # Not cached, so the next build (or --watch event) tries it again
+                        complete = False
+                        stats["failed"] += 1
+                        continue
+                    stats["processed"] += 1
+                    print(f"[OK] {rel}/{e.name}")
+                files[e.name] = {"stat": fsig, "record": record}
+
+        # A folder with a skipped file is always relisted next time
+        entry = {"stat": sig if complete else None, "subdirs": sorted(subdirs), "files": files}
+        stats["dirs_scanned"] += 1
+
+    dirs[rel] = entry
+    for sub in entry["subdirs"]:
+        scan_dir(f"{rel}/{sub}" if rel else sub, old_dirs, dirs, dirty, stats)
+
+def write_if_changed(path, text):
+    """
+    Leaves the file (and its mtime / HTTP validators) alone when nothing changed.
+    """
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            if f.read() == text:
+                return False
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+    return True
+
+def build(dirty=frozenset(), rescan=False):
+    cache_path = os.path.join(BASE_DIR, CACHE_NAME)
+    old_cache = load_json(cache_path, {})
+    old_dirs = {} if rescan or old_cache.get("version") != CACHE_VERSION else old_cache["dirs"]
+
+    dirs = {}
+    stats = {"processed": 0, "failed": 0, "dirs_scanned": 0, "dirs_skipped": 0}
+    scan_dir("", old_dirs, dirs, dirty, stats)
+
+    # Folder key is the path below Attachments/photos, e.g. "travel" or "travel/peru".
+    # Top-level images (rel == "") aren't part of any gallery folder.
+    photo_data = {}
+    for rel in sorted(dirs):
+        if rel and dirs[rel]["files"]:
+            photo_data[rel] = [dirs[rel]["files"][name]["record"] for name in sorted(dirs[rel]["files"])]
+
+    # Remove thumbnails of photos that were deleted or changed
+    keep = {
+        os.path.normpath(os.path.join(BASE_DIR, f["record"]["thumb"]))
+        for d in dirs.values() for f in d["files"].values()
+    }
+    thumb_root = os.path.join(BASE_DIR, THUMB_DIR_NAME)
+    for dirpath, _, files in os.walk(thumb_root):
+        for f in files:
+            p = os.path.normpath(os.path.join(dirpath, f))
+            if p not in keep:
+                os.remove(p)
+
+    write_if_changed(cache_path, json.dumps({"version": CACHE_VERSION, "dirs": dirs}, indent=1, sort_keys=True))
+
+    index = write_shards(photo_data)
+    output_path = os.path.join(BASE_DIR, OUTPUT_NAME)
+    changed = write_if_changed(output_path, json.dumps(index, indent=2, sort_keys=True))
+
+    total = sum(len(v) for v in photo_data.values())
+    print(
+        f"photos.json {'generated successfully' if changed else 'unchanged'} "
+        f"({total} photos in {sum(len(f['shards']) for f in index['folders'].values())} shards, "
+        f"{stats['processed']} processed, {stats['failed']} skipped; "
+        f"{stats['dirs_scanned']} folders scanned, {stats['dirs_skipped']} unchanged)."
+    )
+
+def write_shards(photo_data):
+    """
+    Splits every folder into SHARD_SIZE-record pages, writes any shard that
+    doesn't exist yet, deletes shards nothing refers to, and returns the
+    root index for photos.json.
+    """
+    shard_dir = os.path.join(BASE_DIR, SHARD_DIR_NAME)
+    os.makedirs(shard_dir, exist_ok=True)
+
+    folders = {}
+    keep = set()
+    for folder, records in photo_data.items():
+        shards = []
+        for page, start in enumerate(range(0, len(records), SHARD_SIZE)):
+            text = json.dumps(records[start:start + SHARD_SIZE], separators=(",", ":"), sort_keys=True)
+            digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:SHARD_HASH_LEN]
+            name = f"{folder.replace('/', '~')}.{page}.{digest}.json"
+            path = os.path.join(shard_dir, name)
+            if not os.path.exists(path):
+                write_if_changed(path, text)
+            keep.add(name)
+            shards.append(f"{SHARD_DIR_NAME}/{name}")
+        folders[folder] = {"count": len(records), "shards": shards}
+
+    for name in os.listdir(shard_dir):
+        if name not in keep:
+            os.remove(os.path.join(shard_dir, name))
+
+    return {"version": MANIFEST_VERSION, "shard_size": SHARD_SIZE, "folders": folders}
+
+def watch(debounce=1.0):
+    """
+    Rebuilds on filesystem events (inotify / FSEvents / ReadDirectoryChangesW
+    via watchdog) instead of polling. Bursts of events are batched.
+    """
+    try:
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+    except ImportError:
+        raise SystemExit("--watch needs watchdog: pip install watchdog")
+
+    base = os.path.abspath(BASE_DIR)
+    ignored_dirs = [os.path.join(base, n) for n in (THUMB_DIR_NAME, SHARD_DIR_NAME)]
+    ignored_files = {os.path.join(base, n) for n in (OUTPUT_NAME, CACHE_NAME)}
+    ignored_files |= {f + ".tmp" for f in ignored_files}
+    pending = set()
+    lock = threading.Lock()
+    wake = threading.Event()
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.event_type not in WATCH_EVENT_TYPES:
+                return
+            for p in (event.src_path, getattr(event, "dest_path", "")):
+                if not p:
+                    continue
+                p = os.path.abspath(p)
+                # Our own writes of photos.json / the cache touch the base folder
+                if event.is_directory and p == base:
+                    continue
+                if p in ignored_files or any(p == d or p.startswith(d + os.sep) for d in ignored_dirs):
+                    continue
+                folder = p if event.is_directory else os.path.dirname(p)
+                rel = os.path.relpath(folder, base).replace(os.sep, "/")
+                with lock:
+                    pending.add("" if rel == "." else rel)
+                wake.set()
 
-photo_data = {}
+    observer = Observer()
+    observer.schedule(Handler(), base, recursive=True)
+    observer.start()
+    print(f"Watching {base} (Ctrl+C to stop)...")
+    try:
+        while True:
+            wake.wait()
+            # Debounce: wait until events stop arriving
+            while True:
+                wake.clear()
+                if not wake.wait(debounce):
+                    break
+            with lock:
+                dirty = frozenset(pending)
+                pending.clear()
+            try:
+                build(dirty=dirty)
+            except Exception as e:  # keep watching; the next event retries
+                print(f"[WARN] Rebuild failed: {type(e).__name__}: {e}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        observer.stop()
+        observer.join()
 
-for folder in os.listdir(BASE_DIR):
-    folder_path = os.path.join(BASE_DIR, folder)
-    if os.path.isdir(folder_path):
-        images = [
-            f for f in os.listdir(folder_path)
-            if f.lower().endswith((".jpg", ".jpeg", ".png", ".webp"))
-        ]
-        if images:
-            photo_data[folder] = images
+def main():
+    ap = argparse.ArgumentParser(description="Build Attachments/photos/photos.json for the photo gallery.")
+    ap.add_argument("--watch", action="store_true", help="keep running and update photos.json on file changes")
+    ap.add_argument("--rescan", action="store_true", help="ignore the cached folder index and list every folder")
+    args = ap.parse_args()
 
-output_path = os.path.join(BASE_DIR, "photos.json")
-with open(output_path, "w") as f:
-    json.dump(photo_data, f, indent=2)
+    build(rescan=args.rescan)
+    if args.watch:
+        watch()
 
-print("photos.json generated successfully.")
+if __name__ == "__main__":
+    main()
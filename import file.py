@@ -3,15 +3,14 @@
 Created on Sat Dec  7 17:27:34 2024
 
 @author: neell
-"""
 
-import os
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+Local preview of the site. Kept as a launcher; the server itself lives in
+serve.py (threaded, keep-alive, ETag/Range support):
+
+    python "import file.py" --root . --port 8000
+"""
 
-# Change directory to the project folder
-os.chdir(r"C:\Users\neell\Downloads\Academic Website\templates")
+from serve import main
 
 # Start the server
-httpd = HTTPServer(('localhost', 8000), SimpleHTTPRequestHandler)
-print("Serving at port 8000...")
-httpd.serve_forever()
\ No newline at end of file
+main()
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Write precompressed .gz / .br siblings for the site's text assets
+(generated HTML, CSS, JS, JSON manifests) so serve.py can hand them out
+with sendfile instead of compressing per request.
+
+A sibling is considered up to date when its mtime equals the source's
+(it is stamped that way on write), so re-runs only touch changed files.
+Brotli is optional: without the `brotli` package only .gz files are made.
+
+    python precompress.py --root .
+"""
+
+import os
+import gzip
+import argparse
+from pathlib import Path
+
+# ==============================
+# CONFIG
+# ==============================
+
+DEFAULT_ROOT = Path(__file__).resolve().parent
+
+TEXT_EXTENSIONS = {".html", ".htm", ".css", ".js", ".mjs", ".json", ".svg", ".txt", ".xml", ".map"}
+MIN_SIZE = 512          # below this the headers cost more than compression saves
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# sibling suffix -> Content-Encoding token (serve.py uses this too, best first)
+ENCODINGS = {".br": "br", ".gz": "gzip"}
+
+SKIP_DIRS = {".git", "__pycache__", "node_modules"}
+
+# ==============================
+# Compression
+# ==============================
+
+def gzip_bytes(data: bytes) -> bytes:
+    # mtime=0 keeps the output byte-identical across rebuilds
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+def load_brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return lambda data: brotli.compress(data, quality=BROTLI_QUALITY)
+
+def compressors(use_brotli: bool = True) -> dict:
+    out = {}
+    br = load_brotli() if use_brotli else None
+    if br is not None:
+        out[".br"] = br
+    elif use_brotli:
+        print("[WARN] brotli not installed; writing .gz siblings only (pip install brotli).")
+    out[".gz"] = gzip_bytes
+    return out
+
+def is_compressible(path: Path) -> bool:
+    return path.suffix.lower() in TEXT_EXTENSIONS
+
+def sibling_is_current(src_stat: os.stat_result, sibling: Path) -> bool:
+    try:
+        return sibling.stat().st_mtime_ns == src_stat.st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+def precompress_file(path: Path, comps: dict, stats: dict):
+    st = path.stat()
+    if st.st_size < MIN_SIZE:
+        for suffix in ENCODINGS:
+            remove_sibling(Path(str(path) + suffix), stats)
+        stats["small"] += 1
+        return
+
+    data = None
+    for suffix, compress in comps.items():
+        sibling = Path(str(path) + suffix)
+        if sibling_is_current(st, sibling):
+            stats["current"] += 1
+            continue
+
+        if data is None:
+            data = path.read_bytes()
+        packed = compress(data)
+        if len(packed) >= len(data):
+            remove_sibling(sibling, stats)
+            continue
+
+        tmp = sibling.with_name(sibling.name + ".tmp")
+        tmp.write_bytes(packed)
+        os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(tmp, sibling)
+        stats["written"] += 1
+        stats["saved"] += len(data) - len(packed)
+
+def remove_sibling(sibling: Path, stats: dict):
+    if sibling.exists():
+        sibling.unlink()
+        stats["removed"] += 1
+
+def iter_files(paths):
+    for p in paths:
+        p = Path(p)
+        if p.is_file():
+            yield p
+        elif p.is_dir():
+            for dirpath, dirnames, filenames in os.walk(p):
+                dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+                for name in filenames:
+                    yield Path(dirpath) / name
+
+def precompress_paths(paths, use_brotli: bool = True) -> dict:
+    """Precompress every text asset under `paths` (files or directories)."""
+    comps = compressors(use_brotli)
+    stats = {"written": 0, "current": 0, "small": 0, "removed": 0, "saved": 0}
+
+    for path in iter_files(paths):
+        suffix = path.suffix.lower()
+        if suffix in ENCODINGS:
+            # Orphaned sibling whose source is gone
+            source = path.with_suffix("")
+            if is_compressible(source) and not source.exists():
+                remove_sibling(path, stats)
+            continue
+        if is_compressible(path):
+            precompress_file(path, comps, stats)
+
+    print(
+        f"[OK] Precompressed: {stats['written']} written, {stats['current']} up to date, "
+        f"{stats['small']} too small, {stats['removed']} removed "
+        f"({stats['saved'] / 1024:,.0f} KB saved)"
+    )
+    return stats
+
+# ==============================
+# MAIN
+# ==============================
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Write .gz/.br siblings for text assets.")
+    ap.add_argument("paths", nargs="*", help="Files or directories (default: --root).")
+    ap.add_argument("--root", default=str(DEFAULT_ROOT))
+    ap.add_argument("--no-brotli", action="store_true", help="Only write .gz siblings.")
+    args = ap.parse_args(argv)
+
+    precompress_paths(args.paths or [args.root], use_brotli=not args.no_brotli)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,636 @@
+# -*- coding: utf-8 -*-
+"""
+Static file server for the site root.
+
+Replaces the single-threaded HTTPServer in "import file.py":
+- one thread per connection; --workers bounds requests in flight, so idle
+  keep-alive connections never hold a worker
+- HTTP/1.1 keep-alive
+- strong ETag / Last-Modified validation with 304 responses
+- single byte-range requests (206 / 416) for large photos and PDFs
+- long-lived Cache-Control for fingerprinted files (blog.<hash>.css, shards, ...)
+- .br / .gz siblings written by precompress.py, picked by Accept-Encoding
+  and sent with sendfile (nothing is compressed per request)
+- a byte-bounded LRU of small hot files (index.html, style.css, ...) with
+  precomputed headers; entries drop when the file's mtime changes or when
+  create_blog.py touches the rebuild stamp. Counters: GET /__cache_stats
+- --livereload (used by create_blog.py --watch): HTML pages get a small
+  script that listens on /__livereload (server-sent events) and reloads
+  the page when the rebuild stamp changes
+
+    python serve.py --root . --port 8000 --workers 32
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+import email.utils
+from collections import OrderedDict
+from pathlib import Path
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+from precompress import ENCODINGS, is_compressible
+
+# ==============================
+# CONFIG
+# ==============================
+
+DEFAULT_ROOT = Path(__file__).resolve().parent
+DEFAULT_HOST = "localhost"
+DEFAULT_PORT = 8000
+DEFAULT_WORKERS = 16
+
+KEEPALIVE_TIMEOUT = 15  # seconds an idle keep-alive connection is held open
+KEEPALIVE_BUSY_TIMEOUT = 2  # ... once there are more connections than workers
+
+CACHE_MB = 32           # hot-file cache budget (0 disables the cache)
+CACHE_MAX_FILE_KB = 256 # larger files bypass the cache and are sent with sendfile
+REBUILD_STAMP_NAME = ".rebuild-stamp"  # touched by create_blog.py after a build
+STAMP_CHECK_INTERVAL = 1.0              # seconds between stamp stats
+CACHE_STATS_PATH = "/__cache_stats"
+
+# Live reload (--livereload). Every open tab holds one worker while connected.
+LIVERELOAD_PATH = "/__livereload"
+LIVERELOAD_POLL = 0.1                   # seconds between stamp stats per client
+LIVERELOAD_PING = 15.0                  # keep-alive comment so dead clients are noticed
+LIVERELOAD_SCRIPT = (
+    "<script>(function () {"
+    f"var es = new EventSource({json.dumps(LIVERELOAD_PATH)});"
+    "es.addEventListener(\"reload\", function () { es.close(); location.reload(); });"
+    "})();</script>"
+)
+BODY_CLOSE_RE = re.compile(rb"</body\s*>", re.I)
+
+# blog.<hash10>.css, pages/<folder>.<n>.<hash10>.json, thumbs/<stem>.<hash10>.jpg, ...
+# and the blog's image derivatives, generated/img/<hash16>-<width>.jpg/.webp/.avif
+FINGERPRINT_RE = re.compile(r"\.[0-9a-f]{10}\.[A-Za-z0-9]+$|(^|[\\/])[0-9a-f]{16}-\d+\.(jpg|webp|avif)$")
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# ==============================
+# Validators / ranges
+# ==============================
+
+def make_etag(st: os.stat_result) -> str:
+    """Strong validator from the file's identity, size and mtime."""
+    return f'"{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+def etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match comparison (weak comparison, per RFC 9110)."""
+    if header.strip() == "*":
+        return True
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+def not_modified_since(header: str, mtime: float) -> bool:
+    try:
+        since = email.utils.parsedate_to_datetime(header)
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return False
+    if since is None:
+        return False
+    return int(mtime) <= since.timestamp()
+
+def parse_range(header: str, size: int):
+    """
+    Single "bytes=" range -> (start, end) inclusive, "unsatisfiable", or None
+    (ignore the header and send the whole file; also used for multi-range).
+    """
+    m = RANGE_RE.match(header.strip())
+    if not m:
+        return None
+    first, last = m.group(1), m.group(2)
+    if not first and not last:
+        return None
+
+    if not first:  # suffix: last N bytes
+        n = int(last)
+        if n == 0:
+            return "unsatisfiable"
+        return max(size - n, 0), size - 1
+
+    start = int(first)
+    if start >= size:
+        return "unsatisfiable"
+    end = int(last) if last else size - 1
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+def parse_accept_encoding(header: str) -> dict:
+    """Accept-Encoding -> {token: q}."""
+    accepted = {}
+    for item in header.split(","):
+        token, _, params = item.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+    return accepted
+
+def cache_control_for(path: str) -> str:
+    return IMMUTABLE_CACHE if FINGERPRINT_RE.search(path) else REVALIDATE_CACHE
+
+# ==============================
+# Hot-file cache
+# ==============================
+
+class CacheEntry:
+    """One representation of a file: validators, fixed headers and (maybe) its bytes."""
+
+    __slots__ = ("mtime_ns", "mtime", "size", "etag", "headers", "validators", "body")
+
+    def __init__(self, st: os.stat_result, etag: str, headers: list, validators: list):
+        self.mtime_ns = st.st_mtime_ns
+        self.mtime = st.st_mtime
+        self.size = st.st_size
+        self.etag = etag
+        self.headers = headers          # sent with 200/206
+        self.validators = validators    # sent with 304
+        self.body = None
+
+class HotFileCache:
+    """Byte-bounded LRU of small files, keyed by the path actually served."""
+
+    def __init__(self, max_bytes: int, max_file: int, stamp_path: str):
+        self.max_bytes = max_bytes
+        self.max_file = max_file
+        self.stamp_path = stamp_path
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = self.rebuilds = 0
+        self.stamp = self.read_stamp()
+        self.stamp_checked = time.monotonic()
+
+    def read_stamp(self):
+        try:
+            return os.stat(self.stamp_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def check_rebuild(self):
+        """Drop everything once create_blog.py has touched the stamp (caller holds the lock)."""
+        now = time.monotonic()
+        if now - self.stamp_checked < STAMP_CHECK_INTERVAL:
+            return
+        self.stamp_checked = now
+        stamp = self.read_stamp()
+        if stamp != self.stamp:
+            self.stamp = stamp
+            if self.entries:
+                self.rebuilds += 1
+                self.entries.clear()
+                self.bytes = 0
+
+    def get(self, key: str, st: os.stat_result):
+        with self.lock:
+            self.check_rebuild()
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.mtime_ns != st.st_mtime_ns or entry.size != st.st_size:
+                del self.entries[key]
+                self.bytes -= entry.size
+                self.invalidations += 1
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, entry: CacheEntry):
+        if entry.size > self.max_file or entry.size > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.size
+            self.entries[key] = entry
+            self.bytes += entry.size
+            while self.bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= evicted.size
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "max_file": self.max_file,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "rebuilds": self.rebuilds,
+            }
+
+# ==============================
+# Handler
+# ==============================
+
+class SiteHandler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_TIMEOUT
+    # Headers and body are separate writes; with Nagle on, keep-alive
+    # responses wait ~40 ms for the client's delayed ACK.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path == CACHE_STATS_PATH:
+            self.send_cache_stats()
+            return
+        if self.path == LIVERELOAD_PATH and self.server.livereload:
+            self.send_livereload_events()
+            return
+        self.serve(send_body=True)
+
+    def do_HEAD(self):
+        self.serve(send_body=False)
+
+    def resolve_file(self):
+        """Map the URL to a file, handling directory redirects and index files."""
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            url_path = self.path.split("?", 1)[0].split("#", 1)[0]
+            if not url_path.endswith("/"):
+                return "redirect", None
+            for index in ("index.html", "index.htm"):
+                candidate = os.path.join(path, index)
+                if os.path.isfile(candidate):
+                    return "file", candidate
+            return "listing", None
+        return "file", path
+
+    def serve(self, send_body: bool):
+        kind, path = self.resolve_file()
+        if kind != "file":
+            # Directory redirect / listing: the stdlib already does this and
+            # always sets Content-Length, so keep-alive stays intact.
+            f = SimpleHTTPRequestHandler.send_head(self)
+            if f:
+                try:
+                    if send_body:
+                        self.copyfile(f, self.wfile)
+                finally:
+                    f.close()
+            return
+
+        if self.server.livereload and path.endswith((".html", ".htm")):
+            self.send_html_with_livereload(path, send_body)
+            return
+
+        encoding, send_path = self.negotiate(path)
+        cache = self.server.cache
+
+        if cache is not None:
+            try:
+                entry = cache.get(send_path, os.stat(send_path))
+            except OSError:
+                entry = None
+            if entry is not None:
+                self.send_entry(entry, None, send_body)
+                return
+
+        try:
+            f = open(send_path, "rb")
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+
+        try:
+            entry = self.make_entry(path, encoding, os.fstat(f.fileno()))
+            if cache is not None and entry.size <= cache.max_file:
+                entry.body = f.read()
+                if len(entry.body) == entry.size:
+                    cache.put(send_path, entry)
+                else:
+                    # Rewritten underneath us; send what was read, don't keep it
+                    entry.size = len(entry.body)
+            self.send_entry(entry, f, send_body)
+        finally:
+            f.close()
+
+    def make_entry(self, path: str, encoding, st: os.stat_result) -> CacheEntry:
+        """Precompute everything about a response that doesn't depend on the request."""
+        etag = make_etag(st)
+        validators = [
+            ("ETag", etag),
+            ("Last-Modified", self.date_time_string(st.st_mtime)),
+            ("Cache-Control", cache_control_for(path)),
+        ]
+        if is_compressible(Path(path)):
+            validators.append(("Vary", "Accept-Encoding"))
+
+        headers = [("Content-Type", self.guess_type(path))]
+        if encoding:
+            headers.append(("Content-Encoding", encoding))
+        headers.append(("Accept-Ranges", "bytes"))
+        headers.extend(validators)
+        return CacheEntry(st, etag, headers, validators)
+
+    def send_entry(self, entry: CacheEntry, f, send_body: bool):
+        """Conditional / range handling, then the body from memory or via sendfile."""
+        if self.is_not_modified(entry.etag, entry.mtime):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            for key, value in entry.validators:
+                self.send_header(key, value)
+            self.end_headers()
+            return
+
+        size = entry.size
+        start, end = 0, size - 1
+        status = HTTPStatus.OK
+
+        range_header = self.headers.get("Range")
+        if range_header and size and self.if_range_ok(entry.etag, entry.mtime):
+            rng = parse_range(range_header, size)
+            if rng == "unsatisfiable":
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if rng is not None:
+                start, end = rng
+                status = HTTPStatus.PARTIAL_CONTENT
+
+        length = end - start + 1 if size else 0
+        self.send_response(status)
+        for key, value in entry.headers:
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(length))
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+
+        if not send_body or not length:
+            return
+        if entry.body is not None:
+            self.wfile.write(memoryview(entry.body)[start:end + 1])
+        else:
+            # Headers are already flushed (wfile is unbuffered), so the
+            # body can go straight from the page cache to the socket.
+            self.connection.sendfile(f, start, length)
+
+    def send_cache_stats(self):
+        cache = self.server.cache
+        stats = cache.stats() if cache is not None else {}
+        body = json.dumps({"enabled": cache is not None, **stats}, indent=2).encode("utf-8")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_html_with_livereload(self, path: str, send_body: bool):
+        """Dev mode: HTML with the reload script before </body>; never cached or compressed."""
+        try:
+            with open(path, "rb") as f:
+                body = f.read()
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+        script = LIVERELOAD_SCRIPT.encode("utf-8")
+        matches = list(BODY_CLOSE_RE.finditer(body))
+        at = matches[-1].start() if matches else len(body)
+        body = body[:at] + script + body[at:]
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def send_livereload_events(self):
+        """Server-sent events: "reload" whenever the rebuild stamp changes."""
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.close_connection = True  # no Content-Length: the stream ends with the connection
+
+        stamp_path = os.path.join(self.directory, REBUILD_STAMP_NAME)
+
+        def read_stamp():
+            try:
+                st = os.stat(stamp_path)
+                return st.st_mtime_ns, st.st_size
+            except OSError:
+                return None
+
+        stamp = read_stamp()
+        self.wfile.write(b"retry: 1000\n\n")
+        # An open tab keeps this stream for as long as it lives; don't let
+        # a few of them use up the workers
+        self.release_slot()
+        last_write = time.monotonic()
+        while True:
+            time.sleep(LIVERELOAD_POLL)
+            current = read_stamp()
+            if current != stamp:
+                stamp = current
+                self.wfile.write(b"event: reload\ndata: rebuilt\n\n")
+                last_write = time.monotonic()
+            elif time.monotonic() - last_write >= LIVERELOAD_PING:
+                self.wfile.write(b": ping\n\n")
+                last_write = time.monotonic()
+
+    def is_not_modified(self, etag: str, mtime: float) -> bool:
+        inm = self.headers.get("If-None-Match")
+        if inm is not None:
+            return etag_matches(inm, etag)
+        ims = self.headers.get("If-Modified-Since")
+        if ims is not None:
+            return not_modified_since(ims, mtime)
+        return False
+
+    def if_range_ok(self, etag: str, mtime: float) -> bool:
+        """If-Range: only honour Range when the validator still matches."""
+        if_range = self.headers.get("If-Range")
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith('"'):
+            return if_range == etag
+        return not_modified_since(if_range, mtime)
+
+    def negotiate(self, path: str):
+        """
+        Pick a fresh precompressed sibling -> (encoding, path): the accepted
+        encoding with the highest q, ties going to ENCODINGS order. An explicit
+        identity;q=... above an encoding's q rules that encoding out.
+        """
+        header = self.headers.get("Accept-Encoding")
+        if not header or not is_compressible(Path(path)):
+            return None, path
+        accepted = parse_accept_encoding(header)
+        try:
+            src_mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None, path
+
+        identity_q = accepted.get("identity", 0.0)
+        ranked = sorted(
+            ((accepted.get(token, accepted.get("*", 0.0)), suffix, token) for suffix, token in ENCODINGS.items()),
+            key=lambda c: -c[0],
+        )
+        for q, suffix, token in ranked:
+            if q <= 0 or q < identity_q:
+                continue
+            sibling = path + suffix
+            try:
+                # precompress.py stamps siblings with the source mtime;
+                # anything else is stale and must not be served.
+                if os.stat(sibling).st_mtime_ns == src_mtime:
+                    return token, sibling
+            except OSError:
+                continue
+        return None, path
+
+    def handle_one_request(self):
+        # Wait for the next request without holding a worker slot
+        self.connection.settimeout(self.server.idle_timeout())
+        try:
+            if not self.rfile.peek(1):
+                self.close_connection = True
+                return
+        except OSError:  # idle timeout or reset
+            self.close_connection = True
+            return
+        self.connection.settimeout(self.timeout)
+
+        self.server.slots.acquire()
+        self.holds_slot = True
+        try:
+            super().handle_one_request()
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        finally:
+            self.release_slot()
+
+    def release_slot(self):
+        """Give the worker slot back early (long-lived responses like live reload)."""
+        if self.holds_slot:
+            self.holds_slot = False
+            self.server.slots.release()
+
+# ==============================
+# Server
+# ==============================
+
+class BoundedThreadingHTTPServer(ThreadingHTTPServer):
+    """
+    ThreadingHTTPServer with at most `workers` requests handled at once.
+    A connection takes a slot only while a request is in flight, so idle
+    keep-alive clients can't stall anyone; when connections outnumber
+    workers, idle ones are dropped after KEEPALIVE_BUSY_TIMEOUT.
+    """
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, handler, workers: int, cache: HotFileCache | None = None,
+                 livereload: bool = False):
+        self.workers = workers
+        self.slots = threading.BoundedSemaphore(workers)
+        self.connections = 0
+        self.connections_lock = threading.Lock()
+        self.cache = cache
+        self.livereload = livereload
+        super().__init__(address, handler)
+
+    def idle_timeout(self) -> float:
+        return KEEPALIVE_TIMEOUT if self.connections <= self.workers else KEEPALIVE_BUSY_TIMEOUT
+
+    def process_request_thread(self, request, client_address):
+        with self.connections_lock:
+            self.connections += 1
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            with self.connections_lock:
+                self.connections -= 1
+
+def make_server(root, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=DEFAULT_WORKERS,
+                cache_mb=CACHE_MB, cache_max_file_kb=CACHE_MAX_FILE_KB, livereload=False):
+    root = os.fspath(Path(root).resolve())
+    cache = None
+    if cache_mb > 0:
+        cache = HotFileCache(
+            int(cache_mb * 1024 * 1024),
+            int(cache_max_file_kb * 1024),
+            os.path.join(root, REBUILD_STAMP_NAME),
+        )
+
+    class RootedHandler(SiteHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=root, **kwargs)
+
+    return BoundedThreadingHTTPServer((host, port), RootedHandler, workers, cache, livereload)
+
+# ==============================
+# MAIN
+# ==============================
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Serve the site root.")
+    ap.add_argument("--root", default=str(DEFAULT_ROOT),
+                    help="Directory to serve (default: this script's folder).")
+    ap.add_argument("--host", default=DEFAULT_HOST)
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                    help="Maximum requests handled concurrently.")
+    ap.add_argument("--cache-mb", type=float, default=CACHE_MB,
+                    help="Hot-file cache size in MB (0 disables it).")
+    ap.add_argument("--cache-max-file-kb", type=float, default=CACHE_MAX_FILE_KB,
+                    help="Files larger than this bypass the cache.")
+    ap.add_argument("--livereload", action="store_true",
+                    help="Reload open pages after each create_blog.py build (development).")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.workers < 1:
+        sys.exit("--workers must be at least 1")
+
+    httpd = make_server(args.root, args.host, args.port, args.workers,
+                        args.cache_mb, args.cache_max_file_kb, args.livereload)
+    cache_note = f"{args.cache_mb:g} MB cache" if args.cache_mb > 0 else "no cache"
+    reload_note = ", live reload" if args.livereload else ""
+    print(f"Serving {Path(args.root).resolve()} at http://{args.host}:{args.port}/ "
+          f"({args.workers} workers, {cache_note}{reload_note})...")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    finally:
+        httpd.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+// Client-side search over the index written by blogs/create_blog.py
+// (blogs/generated/search/index.json + <prefix>.<hash>.json term shards).
+// Only the shards for the query's terms are fetched. The tokenizer and
+// stemmer below must match create_blog.py's search_tokens().
+
+(function () {
+    const TOKEN_RE = /[a-z0-9]+/g;
+    const STOPWORDS = new Set((
+        "a an and are as at be but by for from has have in is it its of on or " +
+        "that the this to was were will with"
+    ).split(" "));
+    const STEM_RULES = [
+        ["ational", "ate"], ["ization", "ize"], ["fulness", "ful"], ["iveness", "ive"],
+        ["ingly", ""], ["edly", ""], ["ments", ""], ["ment", ""], ["ness", ""],
+        ["ies", "y"], ["ied", "y"], ["ing", ""], ["ed", ""], ["ly", ""], ["s", ""]
+    ];
+    const MAX_RESULTS = 20;
+    const BM25_K1 = 1.2;
+    const BM25_B = 0.75;
+
+    function foldText(text) {
+        return text.normalize("NFKD").replace(/\p{M}/gu, "").toLowerCase();
+    }
+
+    function stem(word) {
+        for (const [suffix, repl] of STEM_RULES) {
+            if (word.endsWith(suffix) && word.length - suffix.length >= 3) {
+                if (suffix === "s" && /(ss|us|is)$/.test(word)) return word;
+                return word.slice(0, -suffix.length) + repl;
+            }
+        }
+        return word;
+    }
+
+    function tokens(text) {
+        return (foldText(text).match(TOKEN_RE) || [])
+            .filter(t => t.length >= 2 && !STOPWORDS.has(t))
+            .map(stem);
+    }
+
+    function escapeHtml(s) {
+        return s.replace(/[&<>"]/g, c => ({ "&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;" })[c]);
+    }
+
+    class BlogSearch {
+        constructor(indexUrl) {
+            this.base = new URL(indexUrl, document.baseURI);
+            this.index = null;
+            this.shards = new Map(); // prefix -> Promise<{term: [[doc, tf], ...]}>
+        }
+
+        async load() {
+            const response = await fetch(this.base);
+            if (!response.ok) throw new Error(`search index: ${response.status}`);
+            this.index = await response.json();
+            return this.index;
+        }
+
+        shard(prefix) {
+            if (!this.shards.has(prefix)) {
+                const name = this.index.shards[prefix];
+                const promise = name
+                    ? fetch(new URL(name, this.base)).then(r => r.json())
+                    : Promise.resolve({});
+                this.shards.set(prefix, promise);
+            }
+            return this.shards.get(prefix);
+        }
+
+        // Postings for one query term; the last term also matches as a prefix
+        // so results update while typing.
+        async postings(term, asPrefix) {
+            const shard = await this.shard(term.slice(0, this.index.prefix_len));
+            if (!asPrefix) return shard[term] || [];
+            const merged = new Map();
+            for (const [t, list] of Object.entries(shard)) {
+                if (!t.startsWith(term)) continue;
+                for (const [doc, tf] of list) merged.set(doc, (merged.get(doc) || 0) + tf);
+            }
+            return [...merged.entries()];
+        }
+
+        // All terms must match (AND); results are ranked by BM25.
+        async search(query, { tag = "", year = "" } = {}) {
+            const terms = [...new Set(tokens(query))];
+            if (!terms.length) return [];
+
+            const { docs, avg_len: avgLen, facets } = this.index;
+            const lists = await Promise.all(
+                terms.map((t, i) => this.postings(t, i === terms.length - 1))
+            );
+
+            let allowed = null;
+            if (tag) allowed = new Set((facets.tags[tag] || { docs: [] }).docs);
+            if (year) {
+                const byYear = new Set((facets.years.find(f => f.year === year) || { docs: [] }).docs);
+                allowed = allowed ? new Set([...allowed].filter(d => byYear.has(d))) : byYear;
+            }
+
+            const scores = new Map();
+            const hits = new Map();
+            lists.forEach(list => {
+                const idf = Math.log(1 + (docs.length - list.length + 0.5) / (list.length + 0.5));
+                for (const [doc, tf] of list) {
+                    if (allowed && !allowed.has(doc)) continue;
+                    const norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * docs[doc].len / (avgLen || 1));
+                    scores.set(doc, (scores.get(doc) || 0) + idf * tf * (BM25_K1 + 1) / norm);
+                    hits.set(doc, (hits.get(doc) || 0) + 1);
+                }
+            });
+
+            return [...scores.entries()]
+                .filter(([doc]) => hits.get(doc) === terms.length)
+                .sort((a, b) => b[1] - a[1])
+                .slice(0, MAX_RESULTS)
+                .map(([doc, score]) => ({ ...docs[doc], score }));
+        }
+    }
+
+    // Wire up <section class="blog-search" data-index="..." data-root="..."> on blog.html
+    async function init(section) {
+        const search = new BlogSearch(section.dataset.index);
+        try {
+            await search.load();
+        } catch (error) {
+            console.error("Error loading search index:", error);
+            return;
+        }
+
+        const input = section.querySelector(".blog-search-input");
+        const tagSelect = section.querySelector(".blog-search-tag");
+        const yearSelect = section.querySelector(".blog-search-year");
+        const results = section.querySelector(".blog-search-results");
+        const root = section.dataset.root || "";
+
+        Object.entries(search.index.facets.tags).forEach(([slug, facet]) => {
+            tagSelect.add(new Option(`${facet.label} (${facet.docs.length})`, slug));
+        });
+        search.index.facets.years.forEach(({ year, docs }) => {
+            yearSelect.add(new Option(`${year} (${docs.length})`, year));
+        });
+
+        let token = 0;
+        async function run() {
+            const mine = ++token;
+            const found = await search.search(input.value, { tag: tagSelect.value, year: yearSelect.value });
+            if (mine !== token) return; // a newer query finished first
+
+            results.innerHTML = found.map(d => `
+                <li>
+                  <a href="${root}${encodeURI(d.url)}">${escapeHtml(d.title)}</a>
+                  <div class="blog-search-meta">${escapeHtml([d.date, d.tags.join("; ")].filter(Boolean).join(" | "))}</div>
+                  <div class="blog-search-meta">${escapeHtml(d.tagline)}</div>
+                </li>`).join("");
+            results.hidden = !input.value.trim();
+            if (!found.length && input.value.trim()) {
+                results.innerHTML = `<li class="blog-search-meta">No posts found.</li>`;
+            }
+        }
+
+        input.addEventListener("input", run);
+        tagSelect.addEventListener("change", run);
+        yearSelect.addEventListener("change", run);
+        section.hidden = false;
+    }
+
+    document.addEventListener("DOMContentLoaded", () => {
+        document.querySelectorAll(".blog-search[data-index]").forEach(init);
+    });
+
+    window.BlogSearch = BlogSearch;
+    window.BlogSearch.tokens = tokens;
+})();